@@ -1,4 +1,5 @@
 from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
 
 from .diagrams import router as diagrams_router
 from .git import router as git_router
@@ -7,7 +8,7 @@ from .auth import router as auth_router
 from .git_tokens import router as git_tokens_router
 from .files import router as files_router
 
-api_router = APIRouter()
+api_router = APIRouter(default_response_class=ORJSONResponse)
 
 # Public endpoints
 api_router.include_router(auth_router, prefix="/auth", tags=["authentication"])
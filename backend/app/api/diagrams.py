@@ -1,8 +1,14 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from typing import List, Optional
+from itertools import islice
+from datetime import datetime, timezone
 from pydantic import BaseModel
+import orjson
+import uuid
 
 from app.models.diagram import Diagram, DiagramCreate, DiagramUpdate
+from app.utils.responses import etag_matches
 
 router = APIRouter()
 
@@ -10,6 +16,20 @@ router = APIRouter()
 diagrams_db = {}
 
 
+def _get_diagram_or_404(diagram_id: str) -> Diagram:
+    """Look up a diagram with a single dict access, raising 404 if missing"""
+    diagram = diagrams_db.get(diagram_id)
+    if diagram is None:
+        raise HTTPException(status_code=404, detail="Diagram not found")
+    return diagram
+
+
+def _diagram_etag(diagram: Diagram, variant: str = "") -> str:
+    """Build a strong ETag from the diagram id and last update time"""
+    version = int(diagram.updated_at.timestamp() * 1_000_000)
+    return f'"{diagram.id}-{version}{variant}"'
+
+
 class DiagramResponse(BaseModel):
     success: bool
     data: Optional[Diagram] = None
@@ -23,35 +43,63 @@ class DiagramsResponse(BaseModel):
 
 
 @router.get("/", response_model=DiagramsResponse)
-async def get_diagrams():
-    """Get all diagrams"""
-    diagrams = list(diagrams_db.values())
+async def get_diagrams(
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of diagrams to return"),
+    offset: int = Query(0, ge=0, description="Number of diagrams to skip")
+):
+    """Get diagrams, oldest first, one page at a time"""
+    diagrams = list(islice(diagrams_db.values(), offset, offset + limit))
     return DiagramsResponse(success=True, data=diagrams)
 
 
+@router.get("/stream")
+async def stream_diagrams(
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to include, e.g. id,title"),
+    offset: int = Query(0, ge=0, description="Number of diagrams to skip")
+):
+    """Stream diagrams as newline-delimited JSON"""
+    include = None
+    if fields:
+        include = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = include - Diagram.model_fields.keys()
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    # Snapshot the current diagrams so writes during the stream don't break iteration
+    diagrams = list(diagrams_db.values())
+
+    def generate():
+        for diagram in islice(diagrams, offset, None):
+            yield orjson.dumps(diagram.model_dump(include=include)) + b"\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
 @router.get("/{diagram_id}", response_model=DiagramResponse)
-async def get_diagram(diagram_id: str):
+async def get_diagram(diagram_id: str, request: Request, response: Response):
     """Get a specific diagram by ID"""
-    diagram = diagrams_db.get(diagram_id)
-    if not diagram:
-        raise HTTPException(status_code=404, detail="Diagram not found")
+    diagram = _get_diagram_or_404(diagram_id)
+
+    etag = _diagram_etag(diagram)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
     return DiagramResponse(success=True, data=diagram)
 
 
 @router.post("/", response_model=DiagramResponse)
 async def create_diagram(diagram_data: DiagramCreate):
     """Create a new diagram"""
-    import uuid
-    from datetime import datetime
-
+    now = datetime.now(timezone.utc)
     diagram = Diagram(
         id=str(uuid.uuid4()),
         title=diagram_data.title,
         description=diagram_data.description,
         mermaid_code=diagram_data.mermaid_code,
         tags=diagram_data.tags or [],
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow()
+        created_at=now,
+        updated_at=now
     )
     diagrams_db[diagram.id] = diagram
     return DiagramResponse(success=True, data=diagram, message="Diagram created successfully")
@@ -60,14 +108,9 @@ async def create_diagram(diagram_data: DiagramCreate):
 @router.put("/{diagram_id}", response_model=DiagramResponse)
 async def update_diagram(diagram_id: str, diagram_data: DiagramUpdate):
     """Update an existing diagram"""
-    if diagram_id not in diagrams_db:
-        raise HTTPException(status_code=404, detail="Diagram not found")
-
-    diagram = diagrams_db[diagram_id]
-    update_data = diagram_data.dict(exclude_unset=True)
-
-    for field, value in update_data.items():
-        setattr(diagram, field, value)
+    update_data = diagram_data.model_dump(exclude_unset=True)
+    update_data["updated_at"] = datetime.now(timezone.utc)
+    diagram = _get_diagram_or_404(diagram_id).model_copy(update=update_data)
 
     diagrams_db[diagram_id] = diagram
     return DiagramResponse(success=True, data=diagram, message="Diagram updated successfully")
@@ -76,27 +119,32 @@ async def update_diagram(diagram_id: str, diagram_data: DiagramUpdate):
 @router.delete("/{diagram_id}")
 async def delete_diagram(diagram_id: str):
     """Delete a diagram"""
-    if diagram_id not in diagrams_db:
+    if diagrams_db.pop(diagram_id, None) is None:
         raise HTTPException(status_code=404, detail="Diagram not found")
 
-    del diagrams_db[diagram_id]
     return {"success": True, "message": "Diagram deleted successfully"}
 
 
 @router.get("/{diagram_id}/export")
-async def export_diagram(diagram_id: str, format: str = "json"):
+async def export_diagram(diagram_id: str, request: Request, response: Response, format: str = "json"):
     """Export a diagram in various formats"""
-    if diagram_id not in diagrams_db:
-        raise HTTPException(status_code=404, detail="Diagram not found")
+    diagram = _get_diagram_or_404(diagram_id)
+
+    if format not in ("json", "markdown"):
+        raise HTTPException(status_code=400, detail=f"Export format '{format}' not supported")
 
-    diagram = diagrams_db[diagram_id]
+    etag = _diagram_etag(diagram, f"-{format}")
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
 
     # This is a placeholder - actual export logic will be implemented later
     if format == "json":
-        from fastapi.responses import JSONResponse
-        return JSONResponse(content=diagram.dict())
-    elif format == "markdown":
-        content = f"# {diagram.title}\n\n{diagram.description or ''}\n\n```mermaid\n{diagram.mermaid_code}\n```"
-        return {"content": content, "filename": f"{diagram.title}.md"}
-    else:
-        raise HTTPException(status_code=400, detail=f"Export format '{format}' not supported")
\ No newline at end of file
+        return Response(
+            content=diagram.model_dump_json(),
+            media_type="application/json",
+            headers={"ETag": etag}
+        )
+
+    response.headers["ETag"] = etag
+    content = f"# {diagram.title}\n\n{diagram.description or ''}\n\n```mermaid\n{diagram.mermaid_code}\n```"
+    return {"content": content, "filename": f"{diagram.title}.md"}
\ No newline at end of file
@@ -1,68 +1,195 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, Request
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Response, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import re
+import threading
+import orjson
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.middleware.auth import get_current_active_user
 from app.models.user import User
-from app.models.file import DiagramFile, FileVersion
+from app.models.file import DiagramFile, FileVersion, FileType
 from app.schemas.file import (
-    FileCreate, FileUpdate, FileResponse, FileListResponse,
+    FileCreate, FileUpdate, FileResponse, FileSummaryResponse, FileListResponse,
     FileDeleteResponse, FileUploadResponse, FileDownloadResponse,
     FileVersionCreate, FileVersionResponse, FileVersionListResponse,
     FileSearchQuery, FileStatsResponse
 )
 from app.services.file_service import FileStorageService
 from app.services.git_service import GitService
+from app.utils.cache import NamespacedCache
+from app.utils.responses import (
+    XAccelRedirectResponse, ZeroCopyFileResponse, etag_matches, iter_json_envelope, iter_text_chunks
+)
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Read responses cached per user; any write by that user invalidates all of them
+response_cache = NamespacedCache(maxsize=1024, ttl=300)
+
+_FILE_TYPES = frozenset(ft.value for ft in FileType)
+_MERMAID_RE = re.compile(r'```mermaid\n(.*?)\n```', re.DOTALL)
+
+# Git syncs run after the response on their own small pool, so queued syncs never hold
+# the threads request handlers run on; a fixed set of striped locks serializes each repository
+_git_executor = ThreadPoolExecutor(max_workers=settings.GIT_MAX_CONCURRENT_OPS, thread_name_prefix="git-sync")
+_git_repo_locks = tuple(threading.Lock() for _ in range(64))
+
+# Imports are rejected before any parsing above this size
+_MAX_IMPORT_BYTES = settings.FILE_MAX_SIZE_MB * 1024 * 1024
+
+# Downloads handed to nginx must live under this root
+_STORAGE_ROOT = Path(settings.FILE_STORAGE_PATH).resolve()
+
+# Content above these sizes is streamed rather than built up in memory
+_STREAM_CONTENT_THRESHOLD = 256 * 1024
+_STREAM_EXPORT_THRESHOLD = 1 << 20
+
+
+def _cache_key(request: Request) -> tuple:
+    """Build a cache key from the request path and its sorted query parameters"""
+    return request.url.path, tuple(sorted(request.query_params.multi_items()))
+
+
+def _file_etag(db_file: DiagramFile) -> str:
+    """Weak ETag for file metadata; last_accessed_at changes without bumping it"""
+    changed_at = db_file.updated_at or db_file.created_at
+    return f'W/"{db_file.id}-{int(changed_at.timestamp() * 1_000_000)}"'
+
+
+def _content_etag(db_file: DiagramFile) -> str:
+    """Strong ETag for file content, taken from its stored SHA-256 hash"""
+    return f'"{db_file.id}-{db_file.file_hash}"'
+
+
+def _not_modified(request: Request, etag: str) -> Optional[Response]:
+    """Return a 304 response when the client already holds etag"""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return None
+
+
+def _json_response(body: str) -> Response:
+    """Wrap JSON already serialized by pydantic-core, skipping FastAPI's re-encoding"""
+    return Response(content=body, media_type="application/json")
+
+
+def _sync_file_to_git(repo_id: str, source_path: str, git_path: str, message: str) -> None:
+    """Copy a stored file into its Git repository and commit it"""
+    repo_lock = _git_repo_locks[hash(repo_id) % len(_git_repo_locks)]
+    try:
+        with repo_lock:
+            with open(source_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            git_service = GitService()
+            git_service.write_file(repo_id, git_path, content)
+            git_service.create_commit(repo_id, message, files=[git_path])
+    except Exception:
+        # Log Git error; the file itself is already saved
+        logger.exception("Git integration failed for repo_id=%s path=%s", repo_id, git_path)
+
+
+async def _queue_git_sync(repo_id: str, source_path: str, git_path: str, message: str) -> None:
+    """Hand a Git sync to the dedicated pool without waiting for it"""
+    _git_executor.submit(_sync_file_to_git, repo_id, source_path, git_path, message)
+
+
+def _xaccel_path(file_path: str) -> Optional[str]:
+    """Map a stored file to its internal nginx location, if it is under the storage root"""
+    try:
+        relative = Path(file_path).resolve().relative_to(_STORAGE_ROOT)
+    except ValueError:
+        return None
+    return settings.FILE_XACCEL_PREFIX.rstrip("/") + "/" + relative.as_posix()
+
+
+def _export_response(content: str, media_type: str, filename: str) -> Response:
+    """Build a download response for exported text, streaming it when large"""
+    headers = {"Content-Disposition": f"attachment; filename={filename}"}
+    if len(content) > _STREAM_EXPORT_THRESHOLD:
+        return StreamingResponse(iter_text_chunks(content), media_type=media_type, headers=headers)
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
+def _export_json(file_service: FileStorageService, db_file: DiagramFile) -> Response:
+    """Export as JSON with complete diagram data"""
+    export_data = {
+        "id": db_file.id,
+        "display_name": db_file.display_name,
+        "description": db_file.description,
+        "mermaid_code": db_file.mermaid_code,
+        "diagram_data": db_file.diagram_data,
+        "tags": db_file.tags,
+        "file_metadata": db_file.file_metadata,
+        "created_at": db_file.created_at.isoformat(),
+        "updated_at": (db_file.updated_at or db_file.created_at).isoformat()
+    }
+    return ORJSONResponse(
+        content=export_data,
+        headers={"Content-Disposition": f"attachment; filename={db_file.display_name}.json"}
+    )
+
+
+def _export_mmd(file_service: FileStorageService, db_file: DiagramFile) -> Response:
+    """Export as pure Mermaid"""
+    content = db_file.mermaid_code or file_service.read_file_content(db_file).content
+    return _export_response(content, "text/plain", f"{db_file.display_name}.mmd")
+
+
+def _export_md(file_service: FileStorageService, db_file: DiagramFile) -> Response:
+    """Export as Markdown with a Mermaid code block"""
+    mermaid_code = db_file.mermaid_code or file_service.read_file_content(db_file).content
+    content = f"# {db_file.display_name}\n\n"
+    if db_file.description:
+        content += f"{db_file.description}\n\n"
+    content += f"```mermaid\n{mermaid_code}\n```"
+    return _export_response(content, "text/markdown", f"{db_file.display_name}.md")
+
+
+# Keys match the format pattern accepted by export_file
+_EXPORTERS = {"json": _export_json, "mmd": _export_mmd, "md": _export_md}
 
 
 @router.post("/", response_model=FileUploadResponse)
 async def create_file(
     file_data: FileCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Create a new diagram file"""
-    try:
-        file_service = FileStorageService(db)
-        db_file = file_service.create_file(current_user.id, file_data)
-
-        # Integrate with Git if repository specified
-        if file_data.git_repo_id and file_data.git_path:
-            try:
-                git_service = GitService(db)
-                # Add file to Git repository
-                await git_service.add_file_to_repository(
-                    file_data.git_repo_id,
-                    db_file.file_path,
-                    file_data.git_path,
-                    f"Add diagram: {file_data.display_name}"
-                )
-            except Exception as git_error:
-                # Log Git error but don't fail file creation
-                print(f"Git integration failed: {git_error}")
-
-        return FileUploadResponse(
-            success=True,
-            message="File created successfully",
-            file=db_file
+    file_service = FileStorageService(db)
+    db_file = await run_in_threadpool(file_service.create_file, current_user.id, file_data)
+    response_cache.invalidate(current_user.id)
+
+    # Integrate with Git if repository specified, without holding up the response
+    if file_data.git_repository_id and file_data.git_path:
+        background_tasks.add_task(
+            _queue_git_sync,
+            file_data.git_repository_id,
+            db_file.file_path,
+            file_data.git_path,
+            f"Add diagram: {file_data.display_name}"
         )
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to create file: {str(e)}"
-        )
+    return FileUploadResponse(
+        success=True,
+        message="File created successfully",
+        file=db_file
+    )
 
 
 @router.get("/", response_model=FileListResponse)
-async def list_files(
+def list_files(
+    request: Request,
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(20, ge=1, le=100, description="Items per page"),
     query: Optional[str] = Query(None, description="Search query"),
@@ -78,306 +205,304 @@ async def list_files(
     db: Session = Depends(get_db)
 ):
     """List user's files with search and filtering"""
-    try:
-        file_service = FileStorageService(db)
-
-        # Build search query
-        search_query = FileSearchQuery(
-            query=query,
-            file_types=[file_type] if file_type else None,
-            tags=tags.split(',') if tags else None,
-            project_name=project_name,
-            is_public=is_public,
-            date_from=date_from,
-            date_to=date_to,
-            sort_by=sort_by,
-            sort_order=sort_order,
-            page=page,
-            per_page=per_page
-        )
-
-        files, total = file_service.list_files(current_user.id, search_query)
-
-        # Convert to response format
-        file_responses = [FileResponse.from_orm(f) for f in files]
-
-        has_next = (page * per_page) < total
-        has_prev = page > 1
-
-        return FileListResponse(
-            files=file_responses,
-            total=total,
-            page=page,
-            per_page=per_page,
-            has_next=has_next,
-            has_prev=has_prev
-        )
-
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to list files: {str(e)}"
-        )
+    cache_key = _cache_key(request)
+    generation = response_cache.generation(current_user.id)
+    cached = response_cache.get(current_user.id, cache_key)
+    if cached is not None:
+        return _json_response(cached)
+
+    file_service = FileStorageService(db)
+
+    # Build search query
+    search_query = FileSearchQuery(
+        query=query,
+        file_types=[file_type] if file_type else None,
+        tags=tags.split(',') if tags else None,
+        project_name=project_name,
+        is_public=is_public,
+        date_from=date_from,
+        date_to=date_to,
+        sort_by=sort_by,
+        sort_order=sort_order,
+        page=page,
+        per_page=per_page
+    )
+
+    files, total = file_service.list_files(current_user.id, search_query)
+
+    # Rows come straight from the database, so build the page without re-validating it
+    body = FileListResponse.model_construct(
+        files=[FileSummaryResponse.from_orm_trusted(db_file) for db_file in files],
+        total=total,
+        page=page,
+        per_page=per_page,
+        has_next=(page * per_page) < total,
+        has_prev=page > 1
+    ).model_dump_json()
+    response_cache.set(current_user.id, cache_key, body, ttl=60, generation=generation)
+    return _json_response(body)
 
 
 @router.get("/{file_id}", response_model=FileResponse)
-async def get_file(
+def get_file(
     file_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get a specific file"""
-    try:
+    cache_key = _cache_key(request)
+    generation = response_cache.generation(current_user.id)
+    cached = response_cache.get(current_user.id, cache_key)
+
+    if cached is None:
         file_service = FileStorageService(db)
         db_file = file_service.get_file(file_id, current_user.id)
-        return FileResponse.from_orm(db_file)
+        cached = (_file_etag(db_file), FileResponse.from_orm_trusted(db_file))
+        response_cache.set(current_user.id, cache_key, cached, generation=generation)
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to get file: {str(e)}"
-        )
+    etag, file_response = cached
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+    response.headers["ETag"] = etag
+    return file_response
 
 
 @router.get("/{file_id}/content", response_model=FileDownloadResponse)
-async def get_file_content(
+def get_file_content(
     file_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get file content"""
-    try:
-        file_service = FileStorageService(db)
-        return file_service.get_file_content(file_id, current_user.id)
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to get file content: {str(e)}"
+    cache_key = _cache_key(request)
+    generation = response_cache.generation(current_user.id)
+    cached = response_cache.get(current_user.id, cache_key)
+    if cached is not None:
+        etag, content_response = cached
+        not_modified = _not_modified(request, etag)
+        if not_modified:
+            return not_modified
+        response.headers["ETag"] = etag
+        return content_response
+
+    file_service = FileStorageService(db)
+    db_file = file_service.get_file(file_id, current_user.id)
+
+    # Checked before touching the disk
+    etag = _content_etag(db_file)
+    not_modified = _not_modified(request, etag)
+    if not_modified:
+        return not_modified
+
+    if db_file.file_size > _STREAM_CONTENT_THRESHOLD:
+        # Stream large files inside the usual envelope and keep them out of the cache
+        try:
+            handle = open(db_file.file_path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="File not found on disk"
+            )
+        fields = {
+            "success": True,
+            "message": "File retrieved successfully",
+            "filename": db_file.filename,
+            "content_type": file_service.get_content_type(db_file),
+            "size": db_file.file_size
+        }
+        return StreamingResponse(
+            iter_json_envelope(fields, "content", handle),
+            media_type="application/json",
+            headers={"ETag": etag}
         )
 
+    content_response = file_service.read_file_content(db_file)
+    response_cache.set(current_user.id, cache_key, (etag, content_response), generation=generation)
+    response.headers["ETag"] = etag
+    return content_response
+
 
 @router.get("/{file_id}/download")
-async def download_file(
+def download_file(
     file_id: int,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Download a file"""
-    try:
-        file_service = FileStorageService(db)
-        db_file = file_service.get_file(file_id, current_user.id)
+    file_service = FileStorageService(db)
+    db_file = file_service.get_file(file_id, current_user.id)
 
-        # Determine media type
-        media_types = {
-            "mmd": "text/plain",
-            "json": "application/json",
-            "md": "text/markdown",
-            "png": "image/png",
-            "svg": "image/svg+xml"
-        }
-        media_type = media_types.get(db_file.file_type.value, "text/plain")
+    media_type = file_service.get_content_type(db_file)
 
-        return FileResponse(
-            path=db_file.file_path,
-            filename=db_file.filename,
-            media_type=media_type
-        )
+    if settings.FILE_XACCEL_ENABLED:
+        # nginx sends the file itself; no bytes pass through Python
+        internal_path = _xaccel_path(db_file.file_path)
+        if internal_path:
+            return XAccelRedirectResponse(internal_path, db_file.filename, media_type)
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to download file: {str(e)}"
-        )
+    return ZeroCopyFileResponse(
+        path=db_file.file_path,
+        filename=db_file.filename,
+        media_type=media_type
+    )
 
 
 @router.put("/{file_id}", response_model=FileResponse)
 async def update_file(
     file_id: int,
     file_data: FileUpdate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Update a file"""
-    try:
-        file_service = FileStorageService(db)
-        updated_file = file_service.update_file(file_id, current_user.id, file_data)
-
-        # Update in Git if repository specified
-        if updated_file.git_repo_id and updated_file.git_path and file_data.content:
-            try:
-                git_service = GitService(db)
-                await git_service.update_file_in_repository(
-                    updated_file.git_repo_id,
-                    updated_file.file_path,
-                    updated_file.git_path,
-                    f"Update diagram: {file_data.display_name or updated_file.display_name}"
-                )
-            except Exception as git_error:
-                print(f"Git integration failed: {git_error}")
-
-        return FileResponse.from_orm(updated_file)
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to update file: {str(e)}"
+    file_service = FileStorageService(db)
+    updated_file = await run_in_threadpool(file_service.update_file, file_id, current_user.id, file_data)
+    response_cache.invalidate(current_user.id)
+
+    # Update in Git if repository specified
+    if updated_file.git_repository_id and updated_file.git_path and file_data.content:
+        background_tasks.add_task(
+            _queue_git_sync,
+            updated_file.git_repository_id,
+            updated_file.file_path,
+            updated_file.git_path,
+            f"Update diagram: {file_data.display_name or updated_file.display_name}"
         )
 
+    return FileResponse.model_validate(updated_file)
+
 
 @router.delete("/{file_id}", response_model=FileDeleteResponse)
-async def delete_file(
+def delete_file(
     file_id: int,
     permanent: bool = Query(False, description="Permanently delete file"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Delete a file (soft delete by default)"""
-    try:
-        file_service = FileStorageService(db)
-        success = file_service.delete_file(file_id, current_user.id, permanent)
-
-        if success:
-            return FileDeleteResponse(
-                success=True,
-                message="File deleted successfully",
-                file_id=file_id
-            )
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to delete file"
-            )
+    file_service = FileStorageService(db)
+    success = file_service.delete_file(file_id, current_user.id, permanent)
+    response_cache.invalidate(current_user.id)
 
-    except HTTPException:
-        raise
-    except Exception as e:
+    if success:
+        return FileDeleteResponse(
+            success=True,
+            message="File deleted successfully",
+            file_id=file_id
+        )
+    else:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to delete file: {str(e)}"
+            detail="Failed to delete file"
         )
 
 
 @router.get("/{file_id}/versions", response_model=FileVersionListResponse)
-async def get_file_versions(
+def get_file_versions(
     file_id: int,
+    request: Request,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get all versions of a file"""
-    try:
-        file_service = FileStorageService(db)
-        versions = file_service.get_file_versions(file_id, current_user.id)
+    cache_key = _cache_key(request)
+    generation = response_cache.generation(current_user.id)
+    cached = response_cache.get(current_user.id, cache_key)
+    if cached is not None:
+        return _json_response(cached)
 
-        # Get current file to determine current version
-        current_file = file_service.get_file(file_id, current_user.id)
-        current_version = len(versions)  # Latest version is current
+    file_service = FileStorageService(db)
+    _, versions = file_service.get_file_with_versions(file_id, current_user.id)
 
-        version_responses = [FileVersionResponse.from_orm(v) for v in versions]
+    # Versions are newest first, so the head is the current version
+    current_version = versions[0].version_number if versions else 0
 
-        return FileVersionListResponse(
-            versions=version_responses,
-            total=len(versions),
-            current_version=current_version
-        )
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to get file versions: {str(e)}"
-        )
+    body = FileVersionListResponse.model_construct(
+        versions=[FileVersionResponse.from_orm_trusted(version) for version in versions],
+        total=len(versions),
+        current_version=current_version
+    ).model_dump_json()
+    response_cache.set(current_user.id, cache_key, body, ttl=120, generation=generation)
+    return _json_response(body)
 
 
 @router.post("/{file_id}/versions/{version_id}/restore", response_model=FileResponse)
-async def restore_file_version(
+def restore_file_version(
     file_id: int,
     version_id: int,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Restore a file to a specific version"""
-    try:
-        file_service = FileStorageService(db)
+    file_service = FileStorageService(db)
 
-        # Get the version to restore
-        version = db.query(FileVersion).filter(
-            FileVersion.id == version_id,
-            FileVersion.file_id == file_id
-        ).first()
+    # Get the version to restore
+    version = db.query(FileVersion).filter(
+        FileVersion.id == version_id,
+        FileVersion.file_id == file_id
+    ).first()
 
-        if not version:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Version not found"
-            )
-
-        # Read version content
-        with open(version.file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Update file with version content
-        file_data = FileUpdate(
-            content=content,
-            mermaid_code=version.mermaid_code,
-            diagram_data=version.diagram_data,
-            file_metadata=version.file_metadata
+    if not version:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Version not found"
         )
 
-        updated_file = file_service.update_file(file_id, current_user.id, file_data)
+    # Read version content
+    with open(version.file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
 
-        return FileResponse.from_orm(updated_file)
+    # Update file with version content
+    file_data = FileUpdate(
+        content=content,
+        mermaid_code=version.mermaid_code,
+        diagram_data=version.diagram_data,
+        file_metadata=version.file_metadata
+    )
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to restore file version: {str(e)}"
-        )
+    updated_file = file_service.update_file(file_id, current_user.id, file_data)
+    response_cache.invalidate(current_user.id)
+
+    return FileResponse.model_validate(updated_file)
 
 
 @router.get("/stats/overview", response_model=FileStatsResponse)
-async def get_file_stats(
+def get_file_stats(
+    request: Request,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Get file storage statistics for current user"""
-    try:
-        file_service = FileStorageService(db)
-        stats = file_service.get_user_storage_stats(current_user.id)
-
-        # Convert recent files to response format
-        recent_files = [FileResponse.from_orm(f) for f in stats["recent_files"]]
-
-        return FileStatsResponse(
-            total_files=stats["total_files"],
-            total_size=stats["total_size"],
-            files_by_type=stats["files_by_type"],
-            files_by_project=stats["files_by_project"],
-            recent_files=recent_files,
-            storage_used=stats["total_size"],
-            storage_limit=stats["storage_limit"]
-        )
-
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to get file statistics: {str(e)}"
-        )
+    cache_key = _cache_key(request)
+    generation = response_cache.generation(current_user.id)
+    cached = response_cache.get(current_user.id, cache_key)
+    if cached is not None:
+        return _json_response(cached)
+
+    file_service = FileStorageService(db)
+    stats = file_service.get_user_storage_stats(current_user.id)
+
+    body = FileStatsResponse.model_validate({
+        "total_files": stats["total_files"],
+        "total_size": stats["total_size"],
+        "files_by_type": stats["files_by_type"],
+        "files_by_project": stats["files_by_project"],
+        "recent_files": stats["recent_files"],
+        "storage_used": stats["total_size"],
+        "storage_limit": stats["storage_limit"]
+    }, from_attributes=True).model_dump_json()
+    response_cache.set(current_user.id, cache_key, body, ttl=60, generation=generation)
+    return _json_response(body)
 
 
 @router.post("/import")
-async def import_file(
+def import_file(
     content: str,
     filename: str,
     file_type: str,
@@ -386,125 +511,75 @@ async def import_file(
     db: Session = Depends(get_db)
 ):
     """Import a file from content"""
-    try:
-        file_service = FileStorageService(db)
-
-        # Validate file type
-        from app.models.file import FileType
-        if file_type not in [ft.value for ft in FileType]:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid file type"
-            )
+    file_service = FileStorageService(db)
 
-        # Extract Mermaid code if it's a JSON or Markdown file
-        mermaid_code = None
-        diagram_data = None
-
-        if file_type == "json":
-            import json
-            try:
-                diagram_data = json.loads(content)
-                mermaid_code = diagram_data.get("mermaid_code")
-            except json.JSONDecodeError:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Invalid JSON format"
-                )
-        elif file_type == "md":
-            # Extract Mermaid code from markdown
-            import re
-            mermaid_match = re.search(r'```mermaid\n(.*?)\n```', content, re.DOTALL)
-            if mermaid_match:
-                mermaid_code = mermaid_match.group(1).strip()
-        elif file_type == "mmd":
-            mermaid_code = content.strip()
-
-        # Create file
-        file_data = FileCreate(
-            display_name=display_name or filename,
-            file_type=file_type,
-            content=content,
-            mermaid_code=mermaid_code,
-            diagram_data=diagram_data
-        )
-
-        db_file = file_service.create_file(current_user.id, file_data)
-
-        return FileUploadResponse(
-            success=True,
-            message="File imported successfully",
-            file=db_file
+    # Validate file type
+    if file_type not in _FILE_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid file type"
         )
 
-    except HTTPException:
-        raise
-    except Exception as e:
+    if len(content.encode('utf-8')) > _MAX_IMPORT_BYTES:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to import file: {str(e)}"
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"Import content exceeds {settings.FILE_MAX_SIZE_MB}MB"
         )
 
+    # Extract Mermaid code if it's a JSON or Markdown file
+    mermaid_code = None
+    diagram_data = None
+
+    if file_type == "json":
+        try:
+            diagram_data = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid JSON format"
+            )
+        if not isinstance(diagram_data, dict):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="JSON content must be an object"
+            )
+        mermaid_code = diagram_data.get("mermaid_code")
+    elif file_type == "md":
+        # Extract Mermaid code from markdown
+        mermaid_match = _MERMAID_RE.search(content)
+        if mermaid_match:
+            mermaid_code = mermaid_match.group(1).strip()
+    elif file_type == "mmd":
+        mermaid_code = content.strip()
+
+    # Create file
+    file_data = FileCreate(
+        display_name=display_name or filename,
+        file_type=file_type,
+        content=content,
+        mermaid_code=mermaid_code,
+        diagram_data=diagram_data
+    )
+
+    db_file = file_service.create_file(current_user.id, file_data)
+    response_cache.invalidate(current_user.id)
+
+    return FileUploadResponse(
+        success=True,
+        message="File imported successfully",
+        file=db_file
+    )
+
 
 @router.get("/{file_id}/export")
-async def export_file(
+def export_file(
     file_id: int,
     format: str = Query("json", pattern="^(json|mmd|md)$", description="Export format"),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Export a file in different formats"""
-    try:
-        file_service = FileStorageService(db)
-        file_content = file_service.get_file_content(file_id, current_user.id)
-        db_file = file_service.get_file(file_id, current_user.id)
+    file_service = FileStorageService(db)
+    db_file = file_service.get_file(file_id, current_user.id)
 
-        # Transform content based on format
-        if format == "json":
-            # Return as JSON with complete diagram data
-            export_data = {
-                "id": db_file.id,
-                "display_name": db_file.display_name,
-                "description": db_file.description,
-                "mermaid_code": db_file.mermaid_code,
-                "diagram_data": db_file.diagram_data,
-                "tags": db_file.tags,
-                "file_metadata": db_file.file_metadata,
-                "created_at": db_file.created_at.isoformat(),
-                "updated_at": db_file.updated_at.isoformat()
-            }
-            return Response(
-                content=export_data,
-                media_type="application/json",
-                headers={"Content-Disposition": f"attachment; filename={db_file.display_name}.json"}
-            )
-
-        elif format == "mmd":
-            # Export as pure Mermaid
-            content = db_file.mermaid_code or file_content.content
-            return Response(
-                content=content,
-                media_type="text/plain",
-                headers={"Content-Disposition": f"attachment; filename={db_file.display_name}.mmd"}
-            )
-
-        elif format == "md":
-            # Export as Markdown with Mermaid code block
-            mermaid_code = db_file.mermaid_code or file_content.content
-            content = f"# {db_file.display_name}\n\n"
-            if db_file.description:
-                content += f"{db_file.description}\n\n"
-            content += f"```mermaid\n{mermaid_code}\n```"
-            return Response(
-                content=content,
-                media_type="text/markdown",
-                headers={"Content-Disposition": f"attachment; filename={db_file.display_name}.md"}
-            )
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to export file: {str(e)}"
-        )
\ No newline at end of file
+    return _EXPORTERS[format](file_service, db_file)
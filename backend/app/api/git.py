@@ -1,26 +1,25 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Optional, Dict, Any
+from fastapi import APIRouter, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import List, Optional, Dict, Tuple
 from pydantic import BaseModel, Field
 from datetime import datetime
 from sqlalchemy.orm import Session
+import asyncio
+import operator
 
-from app.services.git_service import (
-    git_service,
-    GitRepositoryInfo,
-    GitCommitInfo,
-    GitServiceError,
-    RepositoryNotFoundError,
-    InvalidRepositoryError,
-    GitOperationError,
-    SecurityError
-)
+from app.services.git_service import git_service, GitRepositoryInfo, GitCommitInfo
 from app.core.database import get_db
 from app.services.git_token_service import GitTokenService
 from app.middleware.auth import get_current_active_user
+from app.utils.responses import iter_json_envelope
 from app.models.user import User
 
 router = APIRouter()
 
+# Repository files larger than this are streamed rather than read into one string
+_STREAM_CONTENT_THRESHOLD = 256 * 1024
+
 
 class GitRepository(BaseModel):
     id: str
@@ -82,24 +81,94 @@ class FileOperationRequest(BaseModel):
     content: str = Field(..., description="File content")
 
 
-def handle_git_error(func):
-    """Decorator to handle Git service errors and convert to HTTP exceptions"""
-    async def wrapper(*args, **kwargs):
+_REPO_FIELDS = (
+    "id", "name", "local_path", "default_branch", "current_branch", "is_bare", "is_dirty",
+    "last_commit_hash", "last_commit_message", "last_commit_author", "last_commit_date"
+)
+_get_repo_fields = operator.attrgetter(*_REPO_FIELDS)
+
+
+def _repo_to_model(repo: GitRepositoryInfo, url: Optional[str] = None) -> GitRepository:
+    """Wrap trusted service data in a GitRepository without revalidating it"""
+    return GitRepository.model_construct(
+        **dict(zip(_REPO_FIELDS, _get_repo_fields(repo))),
+        url=repo.url if url is None else url
+    )
+
+
+def _commit_to_model(commit: GitCommitInfo) -> GitCommit:
+    """Wrap trusted service data in a GitCommit without revalidating it"""
+    return GitCommit.model_construct(
+        hash=commit.hash,
+        message=commit.message,
+        author=commit.author,
+        date=commit.date,
+        files=commit.files
+    )
+
+
+class _CommitPageBatcher:
+    """Coalesce concurrent commit page requests for one repo/branch into shared walks"""
+
+    def __init__(self):
+        self._pending: Dict[Tuple[str, Optional[str]], List[Tuple[int, int, asyncio.Future]]] = {}
+        self._flushes: Dict[Tuple[str, Optional[str]], asyncio.Task] = {}
+
+    async def get_commits(self, repo_id: str, branch: Optional[str], limit: int, skip: int) -> List[GitCommitInfo]:
+        """Return one page of commits, sharing the history walk with concurrent callers"""
+        key = (repo_id, branch)
+        future = asyncio.get_running_loop().create_future()
+        # Pages are sliced out of shared walks by offset, so they must start inside the history
+        self._pending.setdefault(key, []).append((max(skip, 0), max(limit, 0), future))
+        if key not in self._flushes:
+            self._flushes[key] = asyncio.create_task(self._flush(key))
+        return await future
+
+    async def _flush(self, key: Tuple[str, Optional[str]]) -> None:
+        # Requests that arrive while a walk is running are served by the next pass
         try:
-            return await func(*args, **kwargs)
-        except SecurityError as e:
-            raise HTTPException(status_code=403, detail=str(e))
-        except RepositoryNotFoundError as e:
-            raise HTTPException(status_code=404, detail=str(e))
-        except InvalidRepositoryError as e:
-            raise HTTPException(status_code=400, detail=str(e))
-        except GitOperationError as e:
-            raise HTTPException(status_code=422, detail=str(e))
-        except GitServiceError as e:
-            raise HTTPException(status_code=500, detail=str(e))
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
-    return wrapper
+            while self._pending.get(key):
+                batch = sorted(self._pending.pop(key), key=lambda request: request[0])
+                await asyncio.gather(*(self._walk(key, run) for run in self._contiguous_runs(batch)))
+        finally:
+            # No await since the pending check, so no request can slip in unserved
+            del self._flushes[key]
+
+    @staticmethod
+    def _contiguous_runs(batch: List[Tuple[int, int, asyncio.Future]]) -> List[List[Tuple[int, int, asyncio.Future]]]:
+        """Split pages sorted by skip into runs that overlap or touch; disjoint pages get their own walk"""
+        runs: List[List[Tuple[int, int, asyncio.Future]]] = []
+        end = -1
+        for skip, limit, future in batch:
+            if runs and skip <= end:
+                runs[-1].append((skip, limit, future))
+                end = max(end, skip + limit)
+            else:
+                runs.append([(skip, limit, future)])
+                end = skip + limit
+        return runs
+
+    async def _walk(self, key: Tuple[str, Optional[str]], run: List[Tuple[int, int, asyncio.Future]]) -> None:
+        # One walk covering the run, sliced per caller afterwards
+        start = run[0][0]
+        end = max(skip + limit for skip, limit, _ in run)
+        repo_id, branch = key
+        try:
+            commits = await run_in_threadpool(
+                git_service.get_commits, repo_id, branch=branch, limit=end - start, skip=start
+            )
+        except Exception as exc:
+            for _, _, future in run:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for skip, limit, future in run:
+            if not future.done():
+                future.set_result(commits[skip - start:skip - start + limit])
+
+
+_commit_batcher = _CommitPageBatcher()
 
 
 @router.get("/repositories", response_model=List[GitRepository])
@@ -107,102 +176,45 @@ async def get_repositories(
     current_user: User = Depends(get_current_active_user)
 ):
     """Get all Git repositories"""
-    try:
-        repo_infos = git_service.list_repositories()
-        return [
-            GitRepository(
-                id=repo.id,
-                name=repo.name,
-                url=repo.url,
-                local_path=repo.local_path,
-                default_branch=repo.default_branch,
-                current_branch=repo.current_branch,
-                is_bare=repo.is_bare,
-                is_dirty=repo.is_dirty,
-                last_commit_hash=repo.last_commit_hash,
-                last_commit_message=repo.last_commit_message,
-                last_commit_author=repo.last_commit_author,
-                last_commit_date=repo.last_commit_date
-            )
-            for repo in repo_infos
-        ]
-    except SecurityError as e:
-        raise HTTPException(status_code=403, detail=str(e))
-    except RepositoryNotFoundError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except InvalidRepositoryError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except GitOperationError as e:
-        raise HTTPException(status_code=422, detail=str(e))
-    except GitServiceError as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    repo_infos = await run_in_threadpool(git_service.list_repositories)
+    return [_repo_to_model(repo) for repo in repo_infos]
 
 
 @router.post("/repositories", response_model=GitOperationResponse)
-@handle_git_error
 async def create_repository(
     request: CreateRepositoryRequest,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """Create a new Git repository"""
-    repo_info = git_service.create_repository(
+    repo_info = await run_in_threadpool(
+        git_service.create_repository,
         name=request.name,
         url=request.url,
         init_bare=request.init_bare
     )
 
-    repo = GitRepository(
-        id=repo_info.id,
-        name=repo_info.name,
-        url=request.url or "",
-        local_path=repo_info.local_path,
-        default_branch=repo_info.default_branch,
-        current_branch=repo_info.current_branch,
-        is_bare=repo_info.is_bare,
-        is_dirty=repo_info.is_dirty,
-        last_commit_hash=repo_info.last_commit_hash,
-        last_commit_message=repo_info.last_commit_message,
-        last_commit_author=repo_info.last_commit_author,
-        last_commit_date=repo_info.last_commit_date
-    )
-
+    # GitRepositoryInfo carries exactly the GitRepository fields
     return GitOperationResponse(
         success=True,
         message="Repository created successfully",
-        data=repo.dict()
+        data={**vars(repo_info), "url": request.url or ""}
     )
 
 
 @router.get("/repositories/{repo_id}", response_model=GitRepository)
-@handle_git_error
 async def get_repository(repo_id: str):
     """Get repository information"""
-    repo_info = git_service.get_repository_info(repo_id)
-
-    return GitRepository(
-        id=repo_info.id,
-        name=repo_info.name,
-        url="",  # URL is not stored in git service
-        local_path=repo_info.local_path,
-        default_branch=repo_info.default_branch,
-        current_branch=repo_info.current_branch,
-        is_bare=repo_info.is_bare,
-        is_dirty=repo_info.is_dirty,
-        last_commit_hash=repo_info.last_commit_hash,
-        last_commit_message=repo_info.last_commit_message,
-        last_commit_author=repo_info.last_commit_author,
-        last_commit_date=repo_info.last_commit_date
-    )
+    repo_info = await run_in_threadpool(git_service.get_repository_info, repo_id)
+
+    # URL is not stored in git service
+    return _repo_to_model(repo_info, url="")
 
 
 @router.delete("/repositories/{repo_id}", response_model=GitOperationResponse)
-@handle_git_error
 async def delete_repository(repo_id: str):
     """Delete a repository"""
-    git_service.delete_repository(repo_id)
+    await run_in_threadpool(git_service.delete_repository, repo_id)
 
     return GitOperationResponse(
         success=True,
@@ -211,43 +223,31 @@ async def delete_repository(repo_id: str):
 
 
 @router.get("/repositories/{repo_id}/commits", response_model=List[GitCommit])
-@handle_git_error
-async def get_commits(repo_id: str, branch: Optional[str] = None, limit: int = 50, skip: int = 0):
+async def get_commits(
+    repo_id: str,
+    branch: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=1000, description="Maximum number of commits to return"),
+    skip: int = Query(0, ge=0, description="Number of commits to skip")
+):
     """Get commits for a repository"""
-    commits = git_service.get_commits(repo_id, branch=branch, limit=limit, skip=skip)
+    commits = await _commit_batcher.get_commits(repo_id, branch, limit, skip)
 
-    return [
-        GitCommit(
-            hash=commit.hash,
-            message=commit.message,
-            author=commit.author,
-            date=commit.date,
-            files=commit.files
-        )
-        for commit in commits
-    ]
+    return [_commit_to_model(commit) for commit in commits]
 
 
 @router.get("/repositories/{repo_id}/commits/{commit_hash}", response_model=GitCommit)
-@handle_git_error
 async def get_commit_details(repo_id: str, commit_hash: str):
     """Get detailed information about a specific commit"""
-    commit = git_service.get_commit_details(repo_id, commit_hash)
+    commit = await run_in_threadpool(git_service.get_commit_details, repo_id, commit_hash)
 
-    return GitCommit(
-        hash=commit.hash,
-        message=commit.message,
-        author=commit.author,
-        date=commit.date,
-        files=commit.files
-    )
+    return _commit_to_model(commit)
 
 
 @router.post("/repositories/{repo_id}/commit", response_model=GitOperationResponse)
-@handle_git_error
 async def commit_changes(repo_id: str, request: CommitRequest):
     """Commit changes to a repository"""
-    commit_hash = git_service.create_commit(
+    commit_hash = await run_in_threadpool(
+        git_service.create_commit,
         repo_id=repo_id,
         message=request.message,
         files=request.files,
@@ -262,26 +262,25 @@ async def commit_changes(repo_id: str, request: CommitRequest):
     )
 
 
-@router.get("/repositories/{repo_id}/status", response_model=Dict[str, Any])
-@handle_git_error
+@router.get("/repositories/{repo_id}/status", response_model=None)
 async def get_repository_status(repo_id: str):
     """Get repository status"""
-    status = git_service.get_status(repo_id)
-    return status
+    # Plain JSON types from the service, so skip response validation and encoding
+    status = await run_in_threadpool(git_service.get_status, repo_id)
+    return ORJSONResponse(status)
 
 
-@router.get("/repositories/{repo_id}/branches", response_model=List[str])
-@handle_git_error
+@router.get("/repositories/{repo_id}/branches", response_model=None)
 async def get_branches(repo_id: str):
     """Get all branches in the repository"""
-    return git_service.get_branches(repo_id)
+    return ORJSONResponse(await run_in_threadpool(git_service.get_branches, repo_id))
 
 
 @router.post("/repositories/{repo_id}/branches", response_model=GitOperationResponse)
-@handle_git_error
 async def create_branch(repo_id: str, request: CreateBranchRequest):
     """Create a new branch"""
-    branch_name = git_service.create_branch(
+    branch_name = await run_in_threadpool(
+        git_service.create_branch,
         repo_id=repo_id,
         branch_name=request.branch_name,
         base_branch=request.base_branch
@@ -295,10 +294,9 @@ async def create_branch(repo_id: str, request: CreateBranchRequest):
 
 
 @router.post("/repositories/{repo_id}/branches/{branch_name}/checkout", response_model=GitOperationResponse)
-@handle_git_error
 async def switch_branch(repo_id: str, branch_name: str):
     """Switch to a different branch"""
-    git_service.switch_branch(repo_id, branch_name)
+    await run_in_threadpool(git_service.switch_branch, repo_id, branch_name)
 
     return GitOperationResponse(
         success=True,
@@ -308,18 +306,21 @@ async def switch_branch(repo_id: str, branch_name: str):
 
 
 @router.get("/repositories/{repo_id}/files/{file_path:path}")
-@handle_git_error
 async def read_file(repo_id: str, file_path: str, commit_hash: Optional[str] = None):
     """Read file content from repository"""
-    content = git_service.read_file(repo_id, file_path, commit_hash=commit_hash)
+    handle, size = await run_in_threadpool(git_service.open_file, repo_id, file_path, commit_hash=commit_hash)
+    if size > _STREAM_CONTENT_THRESHOLD:
+        return StreamingResponse(iter_json_envelope({}, "content", handle), media_type="application/json")
+
+    with handle:
+        content = await run_in_threadpool(handle.read)
     return {"content": content}
 
 
 @router.post("/repositories/{repo_id}/files/{file_path:path}", response_model=GitOperationResponse)
-@handle_git_error
 async def write_file(repo_id: str, file_path: str, request: FileOperationRequest):
     """Write file content to repository"""
-    git_service.write_file(repo_id, file_path, request.content)
+    await run_in_threadpool(git_service.write_file, repo_id, file_path, request.content)
 
     return GitOperationResponse(
         success=True,
@@ -328,10 +329,10 @@ async def write_file(repo_id: str, file_path: str, request: FileOperationRequest
 
 
 @router.post("/repositories/{repo_id}/push", response_model=GitOperationResponse)
-@handle_git_error
 async def push_changes(repo_id: str, request: PushPullRequest):
     """Push changes to remote repository"""
-    git_service.push(
+    await run_in_threadpool(
+        git_service.push,
         repo_id=repo_id,
         remote=request.remote,
         branch=request.branch,
@@ -348,10 +349,10 @@ async def push_changes(repo_id: str, request: PushPullRequest):
 
 
 @router.post("/repositories/{repo_id}/pull", response_model=GitOperationResponse)
-@handle_git_error
 async def pull_changes(repo_id: str, request: PushPullRequest):
     """Pull changes from remote repository"""
-    git_service.pull(
+    await run_in_threadpool(
+        git_service.pull,
         repo_id=repo_id,
         remote=request.remote,
         branch=request.branch,
@@ -1,18 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
 
 from ..core.database import get_db
 from ..schemas.auth import (
     GitTokenCreate, GitTokenUpdate, GitTokenResponse, GitTokenListResponse,
-    GitTokenValidation, StandardResponse
+    StandardResponse, GitProvider
 )
 from ..services.git_token_service import GitTokenService
 from ..middleware.auth import get_current_active_user
-from ..models.user import User
+from ..models.user import User, GitProvider as StoredGitProvider, decode_scopes
 
 router = APIRouter()
 
+# Stored provider enum members by their lowercase value
+_PROVIDERS = {provider.value: provider for provider in StoredGitProvider}
+
 
 @router.post("/", response_model=StandardResponse, status_code=status.HTTP_201_CREATED)
 async def create_git_token(
@@ -77,36 +79,29 @@ async def get_git_tokens(
     git_token_service = GitTokenService(db)
 
     try:
-        db_tokens = git_token_service.get_user_git_tokens(
+        token_rows = git_token_service.get_user_git_token_rows(
             current_user.id,
             active_only=active_only
         )
 
-        tokens_data = []
-        for token in db_tokens:
-            token_data = {
-                "id": token.id,
-                "name": token.name,
-                "provider": token.provider.value,
-                "is_active": token.is_active,
-                "created_at": token.created_at,
-                "updated_at": token.updated_at,
-                "last_used": token.last_used,
-                "expires_at": token.expires_at,
-                "token_preview": git_token_service.get_token_preview(token)
-            }
-
-            # Add scopes if available
-            if token.scopes:
-                import json
-                try:
-                    token_data["scopes"] = json.loads(token.scopes)
-                except:
-                    token_data["scopes"] = []
-
-            tokens_data.append(GitTokenResponse(**token_data))
-
-        return GitTokenListResponse(
+        # Rows come straight from the database, so skip per-item validation
+        tokens_data = [
+            GitTokenResponse.model_construct(
+                id=token.id,
+                name=token.name,
+                provider=GitProvider(token.provider.value),
+                scopes=decode_scopes(token.scopes),
+                is_active=token.is_active,
+                created_at=token.created_at,
+                updated_at=token.updated_at,
+                last_used=token.last_used,
+                expires_at=token.expires_at,
+                token_preview=git_token_service.get_token_preview(token)
+            )
+            for token in token_rows
+        ]
+
+        return GitTokenListResponse.model_construct(
             success=True,
             message="Git tokens retrieved successfully",
             data=tokens_data
@@ -146,11 +141,7 @@ async def get_git_token(
 
         # Add scopes if available
         if db_token.scopes:
-            import json
-            try:
-                token_data["scopes"] = json.loads(db_token.scopes)
-            except:
-                token_data["scopes"] = []
+            token_data["scopes"] = db_token.scopes_list
 
         return StandardResponse(
             success=True,
@@ -195,11 +186,7 @@ async def update_git_token(
 
         # Add scopes if available
         if updated_token.scopes:
-            import json
-            try:
-                response_data["scopes"] = json.loads(updated_token.scopes)
-            except:
-                response_data["scopes"] = []
+            response_data["scopes"] = updated_token.scopes_list
 
         return StandardResponse(
             success=True,
@@ -304,10 +291,8 @@ async def validate_new_git_token(
 
     try:
         # Convert provider string to enum
-        from ..models.user import GitProvider
-        try:
-            provider_enum = GitProvider(provider.lower())
-        except ValueError:
+        provider_enum = _PROVIDERS.get(provider.lower())
+        if provider_enum is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Invalid provider: {provider}. Supported providers: github, gitlab, bitbucket"
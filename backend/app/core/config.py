@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict
-from typing import List
+from functools import cached_property
+from typing import FrozenSet, List
 
 
 class Settings(BaseSettings):
@@ -14,6 +15,9 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = "sqlite:///./atlantis.db"
+    DATABASE_POOL_SIZE: int = 10  # Persistent connections per worker process
+    DATABASE_MAX_OVERFLOW: int = 20  # Extra connections allowed under burst load
+    DATABASE_POOL_RECYCLE: int = 1800  # Seconds before a pooled connection is replaced
 
     # Security
     SECRET_KEY: str = "atlantis-dev-secret-key-change-in-production"
@@ -21,6 +25,7 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     PASSWORD_MIN_LENGTH: int = 8
+    PASSWORD_HASH_ROUNDS: int = 12  # bcrypt cost factor
     ENABLE_PASSWORD_STRENGTH_CHECK: bool = True
 
     # Rate limiting
@@ -49,6 +54,7 @@ class Settings(BaseSettings):
     GIT_ALLOWED_SCHEMES: List[str] = ["http://", "https://", "ssh://", "git://", "git@"]
     GIT_DISABLE_PUSH: bool = False  # Set to True to disable push operations
     GIT_DISABLE_PULL: bool = False  # Set to True to disable pull operations
+    GIT_MAX_CONCURRENT_OPS: int = 2  # Background Git syncs allowed to run at once
 
     # File storage settings
     FILE_STORAGE_PATH: str = "./storage"  # Base path for file storage
@@ -58,16 +64,23 @@ class Settings(BaseSettings):
     FILE_AUTO_VERSIONING: bool = True  # Enable automatic versioning
     FILE_BACKUP_ENABLED: bool = True  # Enable automatic backups
     FILE_SHARE_EXPIRE_DAYS: int = 30  # Default expiration for file shares
+    FILE_XACCEL_ENABLED: bool = False  # Let nginx send downloads via X-Accel-Redirect
+    FILE_XACCEL_PREFIX: str = "/_protected/"  # Internal nginx location aliased to FILE_STORAGE_PATH
 
     # API settings
     API_V1_PREFIX: str = "/api/v1"
     ALLOWED_HOSTS: str = "http://localhost:3000,http://localhost:5173,http://127.0.0.1:3000,http://127.0.0.1:5173"
 
-    @property
+    @cached_property
     def allowed_hosts_list(self) -> List[str]:
         """Get allowed hosts as a list"""
         return [host.strip() for host in self.ALLOWED_HOSTS.split(",") if host.strip()]
 
+    @cached_property
+    def allowed_hosts_set(self) -> FrozenSet[str]:
+        """Get allowed hosts as a set for membership checks"""
+        return frozenset(self.allowed_hosts_list)
+
     # Security headers
     ENABLE_SECURITY_HEADERS: bool = True
     CORS_CREDENTIALS: bool = True
@@ -22,6 +22,9 @@ else:
     engine = create_engine(
         settings.DATABASE_URL,
         pool_pre_ping=True,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
         echo=settings.DEBUG
     )
 
@@ -0,0 +1,21 @@
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+from .config import settings
+
+
+def setup_logging() -> QueueListener:
+    """Route root logging through a queue so handler I/O runs on a background thread"""
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    root = logging.getLogger()
+    root.handlers = [QueueHandler(log_queue)]
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
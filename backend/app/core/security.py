@@ -1,33 +1,49 @@
 from datetime import datetime, timedelta
 from typing import Optional, Union, Any
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import jwt
 from fastapi import HTTPException, status
-from cryptography.fernet import Fernet
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+import bcrypt
 import secrets
 import hashlib
 import os
+import time
 
 from .config import settings
+from ..utils.cache import TTLCache
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt only uses the first 72 bytes of a password
+BCRYPT_MAX_PASSWORD_BYTES = 72
 
-# Encryption for sensitive data
+# Encryption for sensitive data: AES-256-GCM under a key derived once from SECRET_KEY
+_SENSITIVE_DATA_AEAD = AESGCM(HKDF(
+    algorithm=hashes.SHA256(), length=32, salt=None, info=b"sensitive-v1"
+).derive(settings.SECRET_KEY.encode()))
+SENSITIVE_DATA_PREFIX = "v1:"
+SENSITIVE_DATA_NONCE_BYTES = 12
+
+# Key of the legacy XOR scheme, kept so values stored before AES-GCM still decrypt
 ENCRYPTION_KEY = settings.SECRET_KEY.encode()[:32].ljust(32, b'0')
-if len(ENCRYPTION_KEY) < 32:
-    ENCRYPTION_KEY += os.urandom(32 - len(ENCRYPTION_KEY))
-cipher_suite = Fernet(Fernet.generate_key())
+
+# Claims of recently verified access tokens, keyed by a BLAKE2b digest of the token
+_token_cache = TTLCache(maxsize=10_000, ttl=3600)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return bcrypt.checkpw(
+        plain_password.encode()[:BCRYPT_MAX_PASSWORD_BYTES],
+        hashed_password.encode()
+    )
 
 
 def get_password_hash(password: str) -> str:
     """Generate password hash"""
-    return pwd_context.hash(password)
+    salt = bcrypt.gensalt(rounds=settings.PASSWORD_HASH_ROUNDS)
+    return bcrypt.hashpw(password.encode()[:BCRYPT_MAX_PASSWORD_BYTES], salt).decode()
 
 
 def create_access_token(
@@ -75,38 +91,49 @@ def create_refresh_token(
     return encoded_jwt
 
 
-def verify_token(token: str, token_type: str = "access") -> dict:
+def verify_token(token: Union[str, bytes], token_type: str = "access") -> dict:
     """Verify and decode JWT token"""
     try:
+        # PyJWT checks the signature and rejects missing or past exp claims
         payload = jwt.decode(
             token,
             settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
+            algorithms=[settings.ALGORITHM],
+            options={"require": ["exp"]}
         )
-
-        # Check token type
-        if payload.get("type") != token_type:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail=f"Invalid token type. Expected {token_type}",
-            )
-
-        # Check expiration
-        exp = payload.get("exp")
-        if exp is None or datetime.fromtimestamp(exp) < datetime.utcnow():
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token has expired",
-            )
-
-        return payload
-
-    except JWTError:
+    except jwt.PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
         )
 
+    # Check token type
+    if payload.get("type") != token_type:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Invalid token type. Expected {token_type}",
+        )
+
+    return payload
+
+
+def verify_access_token_cached(token: Union[str, bytes]) -> dict:
+    """Verify an access token, reusing the claims of recently verified tokens"""
+    if isinstance(token, str):
+        token = token.encode()
+    key = hashlib.blake2b(token, digest_size=16).digest()
+    payload = _token_cache.get(key)
+    if payload is None:
+        payload = verify_token(token, "access")
+        _token_cache.set(key, payload, ttl=payload["exp"] - time.time())
+    return payload
+
+
+def invalidate_cached_tokens(user_id: int) -> None:
+    """Drop cached claims for every access token issued to a user"""
+    subject = str(user_id)
+    _token_cache.discard_where(lambda payload: payload.get("sub") == subject)
+
 
 def generate_token(length: int = 32) -> str:
     """Generate a secure random token"""
@@ -119,31 +146,39 @@ def generate_device_fingerprint(user_agent: str, ip_address: str) -> str:
     return hashlib.sha256(fingerprint_data.encode()).hexdigest()
 
 
+def _xor_with_key(data: str) -> str:
+    """XOR each character of data with the repeating legacy ENCRYPTION_KEY"""
+    key = ENCRYPTION_KEY
+    try:
+        raw = data.encode('latin-1')
+    except UnicodeEncodeError:
+        # Code points above U+00FF keep their high bits, so go character by character
+        return ''.join(chr(ord(char) ^ key[i % len(key)]) for i, char in enumerate(data))
+
+    # Latin-1 maps code points 0-255 onto single bytes, so one big-integer XOR covers the whole string
+    keystream = (key * (len(raw) // len(key) + 1))[:len(raw)]
+    mixed = int.from_bytes(raw, 'big') ^ int.from_bytes(keystream, 'big')
+    return mixed.to_bytes(len(raw), 'big').decode('latin-1')
+
+
 def encrypt_sensitive_data(data: str) -> str:
     """Encrypt sensitive data like tokens"""
-    # In a real application, use a proper key management system
-    key = settings.SECRET_KEY.encode()[:32].ljust(32, b'0')
-    fernet = Fernet(Fernet.generate_key())
-
-    # For demo purposes, we'll use simple XOR encryption
-    # In production, use proper AES encryption
-    encrypted = []
-    for i, char in enumerate(data):
-        encrypted.append(chr(ord(char) ^ key[i % len(key)]))
-    return ''.join(encrypted).encode().hex()
+    nonce = os.urandom(SENSITIVE_DATA_NONCE_BYTES)
+    ciphertext = _SENSITIVE_DATA_AEAD.encrypt(nonce, data.encode(), None)
+    return SENSITIVE_DATA_PREFIX + (nonce + ciphertext).hex()
 
 
 def decrypt_sensitive_data(encrypted_data: str) -> str:
     """Decrypt sensitive data"""
-    key = settings.SECRET_KEY.encode()[:32].ljust(32, b'0')
-
     try:
-        decrypted = []
-        encrypted_bytes = bytes.fromhex(encrypted_data)
-        for i, char in enumerate(encrypted_bytes.decode()):
-            decrypted.append(chr(ord(char) ^ key[i % len(key)]))
-        return ''.join(decrypted)
-    except:
+        if not encrypted_data.startswith(SENSITIVE_DATA_PREFIX):
+            # Stored with the legacy XOR scheme
+            return _xor_with_key(bytes.fromhex(encrypted_data).decode())
+
+        raw = bytes.fromhex(encrypted_data[len(SENSITIVE_DATA_PREFIX):])
+        nonce, ciphertext = raw[:SENSITIVE_DATA_NONCE_BYTES], raw[SENSITIVE_DATA_NONCE_BYTES:]
+        return _SENSITIVE_DATA_AEAD.decrypt(nonce, ciphertext, None).decode()
+    except (ValueError, UnicodeDecodeError, InvalidTag):
         raise ValueError("Failed to decrypt data")
 
 
@@ -152,7 +187,15 @@ def mask_token(token: str, visible_chars: int = 4) -> str:
     if len(token) <= visible_chars:
         return "*" * len(token)
 
-    return token[:visible_chars] + "*" * (len(token) - visible_chars)
+    # Pad the visible prefix in place rather than building and concatenating a run of stars
+    return token[:visible_chars].ljust(len(token), "*")
+
+
+_PASSWORD_SPECIAL_CHARS = frozenset("!@#$%^&*()_+-=[]{}|;:,.<>?")
+_COMMON_PASSWORDS = frozenset({
+    "password", "123456", "qwerty", "admin", "letmein",
+    "welcome", "monkey", "dragon", "password1", "123456789"
+})
 
 
 def validate_password_strength(password: str) -> tuple[bool, list[str]]:
@@ -162,25 +205,22 @@ def validate_password_strength(password: str) -> tuple[bool, list[str]]:
     if len(password) < 8:
         issues.append("Password must be at least 8 characters long")
 
-    if not any(c.isupper() for c in password):
+    # Classify each distinct character once rather than rescanning the password per rule
+    chars = set(password)
+
+    if not any(c.isupper() for c in chars):
         issues.append("Password must contain at least one uppercase letter")
 
-    if not any(c.islower() for c in password):
+    if not any(c.islower() for c in chars):
         issues.append("Password must contain at least one lowercase letter")
 
-    if not any(c.isdigit() for c in password):
+    if not any(c.isdigit() for c in chars):
         issues.append("Password must contain at least one digit")
 
-    if not any(c in "!@#$%^&*()_+-=[]{}|;:,.<>?" for c in password):
+    if chars.isdisjoint(_PASSWORD_SPECIAL_CHARS):
         issues.append("Password must contain at least one special character")
 
-    # Check for common passwords
-    common_passwords = [
-        "password", "123456", "qwerty", "admin", "letmein",
-        "welcome", "monkey", "dragon", "password1", "123456789"
-    ]
-
-    if password.lower() in common_passwords:
+    if password.lower() in _COMMON_PASSWORDS:
         issues.append("Password is too common")
 
     return len(issues) == 0, issues
@@ -188,11 +228,14 @@ def validate_password_strength(password: str) -> tuple[bool, list[str]]:
 
 def create_api_key() -> str:
     """Generate API key for external integrations"""
-    timestamp = str(int(datetime.utcnow().timestamp()))
-    random_part = secrets.token_urlsafe(32)
-    return f"atk_{timestamp}_{random_part}"
+    return f"atk_{int(time.time())}_{secrets.token_urlsafe(32)}"
 
 
 def hash_api_key(api_key: str) -> str:
     """Hash API key for storage"""
-    return hashlib.sha256(api_key.encode()).hexdigest()
\ No newline at end of file
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+def hash_refresh_token(refresh_token: str) -> str:
+    """Hash refresh token for storage and lookup"""
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
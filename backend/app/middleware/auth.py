@@ -1,19 +1,49 @@
-from fastapi import Depends, HTTPException, status, Request
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import Depends, HTTPException, status, Request, Response
+from fastapi.security import HTTPBearer
 from sqlalchemy.orm import Session
-from typing import Optional, List, Dict, Any
-from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any, Deque, Tuple
+from collections import deque
+import functools
+import inspect
+import threading
 import time
 import json
 
 from ..core.database import get_db
-from ..core.security import verify_token
+from ..core.security import verify_access_token_cached
 from ..services.auth_service import AuthService
 from ..models.user import User
 from ..schemas.auth import TokenData
 
+
+class RawHTTPBearer(HTTPBearer):
+    """HTTP Bearer scheme that returns the token as raw header bytes"""
+
+    async def __call__(self, request: Request) -> Optional[bytes]:
+        for name, value in request.headers.raw:
+            if name == b"authorization":
+                scheme, _, token = value.partition(b" ")
+                if scheme.lower() == b"bearer" and token:
+                    return token
+                break
+
+        if not self.auto_error:
+            return None
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+
 # HTTP Bearer scheme for token extraction
-security = HTTPBearer()
+security = RawHTTPBearer()
+optional_security = RawHTTPBearer(auto_error=False)
+
+
+def get_auth_service(db: Session = Depends(get_db)) -> AuthService:
+    """Get an auth service bound to the request's database session"""
+    return AuthService(db)
 
 
 class JWTMiddleware:
@@ -25,63 +55,40 @@ class JWTMiddleware:
     def __call__(
         self,
         request: Request,
-        credentials: HTTPAuthorizationCredentials = Depends(security),
-        db: Session = Depends(get_db)
+        token: bytes = Depends(security),
+        auth_service: AuthService = Depends(get_auth_service)
     ) -> User:
         """Authenticate and authorize user"""
-        try:
-            # Verify token
-            payload = verify_token(credentials.credentials, "access")
+        payload = verify_access_token_cached(token)
 
-            # Extract user information
-            user_id = int(payload.get("sub"))
-            username = payload.get("username")
+        # Check required scopes
+        if self.required_scopes:
             scopes = payload.get("scopes", [])
+            if not any(scope in scopes for scope in self.required_scopes):
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Insufficient permissions"
+                )
 
-            # Check required scopes
-            if self.required_scopes:
-                if not any(scope in scopes for scope in self.required_scopes):
-                    raise HTTPException(
-                        status_code=status.HTTP_403_FORBIDDEN,
-                        detail="Insufficient permissions"
-                    )
-
-            # Get user from database
-            auth_service = AuthService(db)
-            user = auth_service.get_current_user(credentials.credentials)
+        # Get user from database
+        user = auth_service.get_user_from_token_payload(payload)
 
-            # Add user to request state for later use
-            request.state.user = user
-            request.state.user_id = user.id
-            request.state.username = user.username
+        # Add user to request state for later use
+        request.state.user = user
+        request.state.user_id = user.id
+        request.state.username = user.username
 
-            return user
-
-        except HTTPException:
-            raise
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail=f"Authentication failed: {str(e)}"
-            )
+        return user
 
 
 def get_current_user(
     request: Request,
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    token: bytes = Depends(security),
+    auth_service: AuthService = Depends(get_auth_service)
 ) -> User:
     """Get current authenticated user"""
-    try:
-        auth_service = AuthService(db)
-        return auth_service.get_current_user(credentials.credentials)
-    except HTTPException:
-        raise
-    except Exception:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials"
-        )
+    payload = verify_access_token_cached(token)
+    return auth_service.get_user_from_token_payload(payload)
 
 
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
@@ -95,18 +102,16 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
 
 
 def get_optional_current_user(
-    request: Request,
-    db: Session = Depends(get_db)
+    token: Optional[bytes] = Depends(optional_security),
+    auth_service: AuthService = Depends(get_auth_service)
 ) -> Optional[User]:
     """Get current user if authenticated, None otherwise"""
-    auth_header = request.headers.get("authorization")
-    if not auth_header or not auth_header.startswith("Bearer "):
+    if token is None:
         return None
 
     try:
-        token = auth_header.split(" ")[1]
-        auth_service = AuthService(db)
-        return auth_service.get_current_user(token)
+        payload = verify_access_token_cached(token)
+        return auth_service.get_user_from_token_payload(payload)
     except:
         return None
 
@@ -115,13 +120,46 @@ class RateLimitMiddleware:
     """Rate limiting middleware for API endpoints"""
 
     def __init__(self):
-        self.requests: Dict[str, List[datetime]] = {}
+        # Monotonic request times per (endpoint type, client), oldest first
+        self.requests: Dict[Tuple[str, str], Deque[float]] = {}
+        self._lock = threading.Lock()
         self.rate_limits = {
             "login": {"requests": 5, "window": 300},  # 5 login attempts per 5 minutes
             "register": {"requests": 3, "window": 600},  # 3 registrations per 10 minutes
             "password_reset": {"requests": 3, "window": 600},  # 3 password resets per 10 minutes
             "default": {"requests": 100, "window": 3600}  # 100 requests per hour
         }
+        self.sweep_interval = 60
+        self._next_sweep = time.monotonic() + self.sweep_interval
+
+    def _client_key(self, request: Request, identifier: Optional[str]) -> str:
+        """Identify the client, defaulting to its IP address"""
+        if identifier:
+            return identifier
+        forwarded_for = request.headers.get("x-forwarded-for")
+        if forwarded_for:
+            return forwarded_for.split(",")[0].strip()
+        return request.client.host
+
+    @staticmethod
+    def _prune(timestamps: Deque[float], window_seconds: int, now: float) -> Deque[float]:
+        """Drop request times that have left the window"""
+        # Times are appended in order, so expired entries are always at the left
+        cutoff = now - window_seconds
+        while timestamps and timestamps[0] <= cutoff:
+            timestamps.popleft()
+        return timestamps
+
+    def _sweep(self, now: float) -> None:
+        """Forget buckets with no requests inside their endpoint's window"""
+        idle = [
+            key for key, timestamps in self.requests.items()
+            if not timestamps
+            or timestamps[-1] <= now - self.rate_limits.get(key[0], self.rate_limits["default"])["window"]
+        ]
+        for key in idle:
+            del self.requests[key]
+        self._next_sweep = now + self.sweep_interval
 
     def check_rate_limit(
         self,
@@ -130,38 +168,17 @@ class RateLimitMiddleware:
         identifier: Optional[str] = None
     ) -> bool:
         """Check if request is within rate limits"""
-        # Get identifier for rate limiting
-        if identifier:
-            key = identifier
-        else:
-            # Use IP address as default identifier
-            forwarded_for = request.headers.get("x-forwarded-for")
-            if forwarded_for:
-                key = forwarded_for.split(",")[0].strip()
-            else:
-                key = request.client.host
-
-        # Get rate limit settings
         rate_limit = self.rate_limits.get(endpoint_type, self.rate_limits["default"])
-        max_requests = rate_limit["requests"]
-        window_seconds = rate_limit["window"]
-
-        # Clean old requests
-        current_time = datetime.now(timezone.utc)
-        if key in self.requests:
-            self.requests[key] = [
-                req_time for req_time in self.requests[key]
-                if (current_time - req_time).total_seconds() < window_seconds
-            ]
-        else:
-            self.requests[key] = []
-
-        # Check if under limit
-        if len(self.requests[key]) >= max_requests:
-            return False
-
-        # Add current request
-        self.requests[key].append(current_time)
+        key = (endpoint_type, self._client_key(request, identifier))
+        now = time.monotonic()
+
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            timestamps = self._prune(self.requests.setdefault(key, deque()), rate_limit["window"], now)
+            if len(timestamps) >= rate_limit["requests"]:
+                return False
+            timestamps.append(now)
         return True
 
     def get_rate_limit_headers(
@@ -171,30 +188,16 @@ class RateLimitMiddleware:
         identifier: Optional[str] = None
     ) -> Dict[str, str]:
         """Get rate limit headers for response"""
-        # Get identifier
-        if identifier:
-            key = identifier
-        else:
-            forwarded_for = request.headers.get("x-forwarded-for")
-            if forwarded_for:
-                key = forwarded_for.split(",")[0].strip()
-            else:
-                key = request.client.host
-
-        # Get rate limit settings
         rate_limit = self.rate_limits.get(endpoint_type, self.rate_limits["default"])
         max_requests = rate_limit["requests"]
         window_seconds = rate_limit["window"]
+        key = (endpoint_type, self._client_key(request, identifier))
 
-        # Get current request count
         current_count = 0
-        if key in self.requests:
-            current_time = datetime.now(timezone.utc)
-            self.requests[key] = [
-                req_time for req_time in self.requests[key]
-                if (current_time - req_time).total_seconds() < window_seconds
-            ]
-            current_count = len(self.requests[key])
+        with self._lock:
+            timestamps = self.requests.get(key)
+            if timestamps is not None:
+                current_count = len(self._prune(timestamps, window_seconds, time.monotonic()))
 
         # Calculate reset time
         reset_time = int(time.time()) + window_seconds
@@ -206,6 +209,10 @@ class RateLimitMiddleware:
         }
 
 
+# Shared limiter so request history persists across calls within a process
+rate_limiter = RateLimitMiddleware()
+
+
 # Dependency functions for specific endpoint types
 def require_auth() -> JWTMiddleware:
     """Require authentication"""
@@ -222,59 +229,69 @@ def require_admin() -> JWTMiddleware:
     return JWTMiddleware(["admin"])
 
 
-def check_rate_limit_login(request: Request) -> bool:
+def check_rate_limit_login(request: Request, response: Response) -> bool:
     """Check rate limit for login endpoint"""
-    middleware = RateLimitMiddleware()
-    if not middleware.check_rate_limit(request, "login"):
+    if not rate_limiter.check_rate_limit(request, "login"):
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Too many login attempts. Please try again later."
         )
+    response.headers.update(rate_limiter.get_rate_limit_headers(request, "login"))
     return True
 
 
-def check_rate_limit_register(request: Request) -> bool:
+def check_rate_limit_register(request: Request, response: Response) -> bool:
     """Check rate limit for registration endpoint"""
-    middleware = RateLimitMiddleware()
-    if not middleware.check_rate_limit(request, "register"):
+    if not rate_limiter.check_rate_limit(request, "register"):
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Too many registration attempts. Please try again later."
         )
+    response.headers.update(rate_limiter.get_rate_limit_headers(request, "register"))
     return True
 
 
-def check_rate_limit_password_reset(request: Request) -> bool:
+def check_rate_limit_password_reset(request: Request, response: Response) -> bool:
     """Check rate limit for password reset endpoint"""
-    middleware = RateLimitMiddleware()
-    if not middleware.check_rate_limit(request, "password_reset"):
+    if not rate_limiter.check_rate_limit(request, "password_reset"):
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Too many password reset attempts. Please try again later."
         )
+    response.headers.update(rate_limiter.get_rate_limit_headers(request, "password_reset"))
     return True
 
 
 def get_rate_limit_headers_decorator(endpoint_type: str = "default"):
     """Decorator to add rate limit headers to response"""
+    def store_headers(args, kwargs):
+        request = None
+        for arg in args:
+            if isinstance(arg, Request):
+                request = arg
+                break
+
+        if not request:
+            # Try to get request from kwargs
+            request = kwargs.get("request")
+
+        if request:
+            headers = rate_limiter.get_rate_limit_headers(request, endpoint_type)
+            # Store headers in request state for later use
+            request.state.rate_limit_headers = headers
+
     def decorator(func):
+        # Keep the endpoint's signature and coroutine-ness visible to FastAPI
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                store_headers(args, kwargs)
+                return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            request = None
-            for arg in args:
-                if isinstance(arg, Request):
-                    request = arg
-                    break
-
-            if not request:
-                # Try to get request from kwargs
-                request = kwargs.get("request")
-
-            if request:
-                middleware = RateLimitMiddleware()
-                headers = middleware.get_rate_limit_headers(request, endpoint_type)
-                # Store headers in request state for later use
-                request.state.rate_limit_headers = headers
-
+            store_headers(args, kwargs)
             return func(*args, **kwargs)
         return wrapper
     return decorator
\ No newline at end of file
@@ -1,11 +1,73 @@
 from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 from datetime import datetime, timezone
+import logging
 import time
-import json
+
+import orjson
+
 from ..core.config import settings
 
 
+logger = logging.getLogger(__name__)
+
+
+# Content Security Policy
+_CSP = (
+    "default-src 'self'; "
+    "script-src 'self' 'unsafe-inline' 'unsafe-eval'; "
+    "style-src 'self' 'unsafe-inline'; "
+    "img-src 'self' data: https:; "
+    "font-src 'self'; "
+    "connect-src 'self'; "
+    "frame-ancestors 'none'; "
+    "base-uri 'self'; "
+    "form-action 'self'"
+)
+
+_PERMISSIONS_POLICY = (
+    "geolocation=(), "
+    "microphone=(), "
+    "camera=(), "
+    "payment=(), "
+    "usb=(), "
+    "magnetometer=(), "
+    "gyroscope=(), "
+    "accelerometer=()"
+)
+
+# Encoded once, in the raw (lowercase name, value) form Starlette sends
+SECURITY_HEADERS = (
+    (b"content-security-policy", _CSP.encode()),
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    (b"permissions-policy", _PERMISSIONS_POLICY.encode()),
+)
+
+# Strict-Transport-Security is only sent in production, where the app is served over HTTPS
+PRODUCTION_SECURITY_HEADERS = SECURITY_HEADERS + (
+    (b"strict-transport-security", b"max-age=31536000; includeSubDomains; preload"),
+)
+
+
+class UnhandledErrorMiddleware(BaseHTTPMiddleware):
+    """Turn unexpected errors into a generic 500 inside the CORS and security header middleware"""
+
+    async def dispatch(self, request: Request, call_next):
+        try:
+            return await call_next(request)
+        except Exception as exc:
+            # HTTPException keeps its own handler; anything else is reported without internals
+            logger.error("Unhandled error on %s %s", request.method, request.url.path, exc_info=exc)
+            return ORJSONResponse(
+                status_code=500,
+                content={"success": False, "message": "Internal server error"}
+            )
+
+
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     """Middleware to add security headers to responses"""
 
@@ -13,49 +75,9 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         response = await call_next(request)
 
         if settings.ENABLE_SECURITY_HEADERS:
-            # Content Security Policy
-            csp = (
-                "default-src 'self'; "
-                "script-src 'self' 'unsafe-inline' 'unsafe-eval'; "
-                "style-src 'self' 'unsafe-inline'; "
-                "img-src 'self' data: https:; "
-                "font-src 'self'; "
-                "connect-src 'self'; "
-                "frame-ancestors 'none'; "
-                "base-uri 'self'; "
-                "form-action 'self'"
+            response.raw_headers.extend(
+                PRODUCTION_SECURITY_HEADERS if settings.ENVIRONMENT == "production" else SECURITY_HEADERS
             )
-            response.headers["Content-Security-Policy"] = csp
-
-            # X-Content-Type-Options
-            response.headers["X-Content-Type-Options"] = "nosniff"
-
-            # X-Frame-Options
-            response.headers["X-Frame-Options"] = "DENY"
-
-            # X-XSS-Protection
-            response.headers["X-XSS-Protection"] = "1; mode=block"
-
-            # Strict-Transport-Security (HTTPS only)
-            if settings.ENVIRONMENT == "production":
-                hsts = "max-age=31536000; includeSubDomains; preload"
-                response.headers["Strict-Transport-Security"] = hsts
-
-            # Referrer Policy
-            response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-
-            # Permissions Policy
-            permissions_policy = (
-                "geolocation=(), "
-                "microphone=(), "
-                "camera=(), "
-                "payment=(), "
-                "usb=(), "
-                "magnetometer=(), "
-                "gyroscope=(), "
-                "accelerometer=()"
-            )
-            response.headers["Permissions-Policy"] = permissions_policy
 
         return response
 
@@ -64,10 +86,11 @@ class AuditLogMiddleware(BaseHTTPMiddleware):
     """Middleware to log API requests for audit purposes"""
 
     async def dispatch(self, request: Request, call_next):
-        if not settings.ENABLE_AUDIT_LOG:
+        # Records are only emitted in debug mode, so skip the bookkeeping otherwise
+        if not (settings.ENABLE_AUDIT_LOG and settings.DEBUG):
             return await call_next(request)
 
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         # Get request details
         method = request.method
@@ -80,9 +103,8 @@ class AuditLogMiddleware(BaseHTTPMiddleware):
         response = await call_next(request)
 
         # Calculate processing time
-        process_time = time.time() - start_time
+        process_time = time.perf_counter() - start_time
 
-        # Log request details (in production, you'd use a proper logging system)
         log_data = {
             "method": method,
             "url": url,
@@ -98,8 +120,7 @@ class AuditLogMiddleware(BaseHTTPMiddleware):
             log_data["user_id"] = request.state.user_id
             log_data["username"] = request.state.username
 
-        # Log to console for now (in production, use proper logging)
-        if settings.DEBUG:
-            print(f"AUDIT: {json.dumps(log_data)}")
+        # The root logger hands records to a background thread, so this never blocks on stdout
+        logger.info("AUDIT: %s", orjson.dumps(log_data).decode())
 
-        return response
\ No newline at end of file
+        return response
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Boolean, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Boolean, Enum, Index, cast, text, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB, to_tsvector
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -8,6 +9,10 @@ from ..core.database import Base
 from .user import User
 
 
+# Binary JSON on PostgreSQL so tags can use containment and a GIN index; plain JSON elsewhere
+JSONVariant = JSON().with_variant(JSONB(), "postgresql")
+
+
 class FileType(enum.Enum):
     """Supported file types for diagram storage"""
     MERMAID = "mmd"
@@ -17,9 +22,27 @@ class FileType(enum.Enum):
     SVG = "svg"
 
 
+class ShareType(enum.Enum):
+    """How a file share is accessed"""
+    PUBLIC = "public"
+    LINK = "link"
+    PASSWORD = "password"
+
+
 class DiagramFile(Base):
     """File metadata model for diagram files"""
     __tablename__ = "diagram_files"
+    __table_args__ = (
+        # Match list_files: always scoped to the owner, then sorted or filtered
+        Index("ix_diagram_files_user_created", "user_id", "created_at"),
+        Index("ix_diagram_files_user_type", "user_id", "file_type"),
+        Index("ix_diagram_files_user_project", "user_id", "project_name"),
+        Index("ix_diagram_files_user_hash", "user_id", "file_hash"),  # Duplicate check on upload
+        Index(
+            "ix_diagram_files_tags", "tags",
+            postgresql_using="gin", postgresql_ops={"tags": "jsonb_path_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     filename = Column(String(255), nullable=False)  # Original filename
@@ -32,9 +55,9 @@ class DiagramFile(Base):
 
     # Content metadata
     mermaid_code = Column(Text)  # Extracted Mermaid code (for .mmd files)
-    diagram_data = Column(JSON)  # Complete diagram data (for .json files)
-    tags = Column(JSON)  # Tags as JSON array
-    file_metadata = Column(JSON)  # Additional metadata as JSON
+    diagram_data = Column(JSONVariant)  # Complete diagram data (for .json files)
+    tags = Column(JSONVariant)  # Tags as JSON array
+    file_metadata = Column(JSONVariant)  # Additional metadata as JSON
 
     # Foreign key to user (owner)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -45,8 +68,9 @@ class DiagramFile(Base):
     folder_path = Column(String(500))  # Internal folder structure
 
     # Version control integration
-    git_repo_id = Column(Integer, ForeignKey("git_tokens.id"))  # Associated Git repo
+    git_repo_id = Column(Integer, ForeignKey("git_tokens.id"), index=True)  # Associated Git repo
     git_repo = relationship("GitToken")
+    git_repository_id = Column(String(36))  # GitService repository the file is committed to
     git_path = Column(String(500))  # Path in Git repository
     git_branch = Column(String(100))  # Git branch
     git_commit = Column(String(40))  # Last commit hash
@@ -74,6 +98,9 @@ class DiagramFile(Base):
 class FileVersion(Base):
     """Version history for diagram files"""
     __tablename__ = "file_versions"
+    __table_args__ = (
+        Index("ix_file_versions_file_number", "file_id", "version_number"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     file_id = Column(Integer, ForeignKey("diagram_files.id"), nullable=False)
@@ -90,8 +117,8 @@ class FileVersion(Base):
 
     # Content snapshots
     mermaid_code = Column(Text)
-    diagram_data = Column(JSON)
-    file_metadata = Column(JSON)
+    diagram_data = Column(JSONVariant)
+    file_metadata = Column(JSONVariant)
 
     # Git integration
     git_commit = Column(String(40))  # Git commit hash for this version
@@ -113,13 +140,12 @@ class FileShare(Base):
     __tablename__ = "file_shares"
 
     id = Column(Integer, primary_key=True, index=True)
-    file_id = Column(Integer, ForeignKey("diagram_files.id"), nullable=False)
+    file_id = Column(Integer, ForeignKey("diagram_files.id"), nullable=False, index=True)
     file = relationship("DiagramFile")
 
     # Sharing details
     share_token = Column(String(64), unique=True, nullable=False, index=True)
-    share_type = Column(Enum(enum.Enum('ShareType', 'PUBLIC LINK PASSWORD')),
-                       default='LINK', nullable=False)
+    share_type = Column(Enum(ShareType), default=ShareType.LINK, nullable=False)
     password_hash = Column(String(255))  # For password-protected shares
 
     # Access control
@@ -154,6 +180,21 @@ class FileShare(Base):
         return f"<FileShare(id={self.id}, file_id={self.file_id}, token='{self.share_token}')>"
 
 
+# Full-text search document for PostgreSQL; queries must use this exact expression to hit the index
+SEARCH_CONFIG = text("'english'")
+_SEPARATOR = type_coerce(text("' '"), String)
+_EMPTY = type_coerce(text("''"), String)
+_files = DiagramFile.__table__.c
+search_document = to_tsvector(
+    SEARCH_CONFIG,
+    func.coalesce(_files.display_name, _EMPTY) + _SEPARATOR
+    + func.coalesce(_files.description, _EMPTY) + _SEPARATOR
+    + func.coalesce(_files.mermaid_code, _EMPTY) + _SEPARATOR
+    + func.coalesce(cast(_files.tags, Text), _EMPTY)
+)
+Index("ix_diagram_files_search", search_document, postgresql_using="gin").ddl_if(dialect="postgresql")
+
+
 # Add relationships to User model
 User.files = relationship("DiagramFile", back_populates="owner", cascade="all, delete-orphan")
 DiagramFile.versions = relationship("FileVersion", back_populates="file", cascade="all, delete-orphan")
\ No newline at end of file
@@ -1,12 +1,24 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
+from typing import List, Optional
 import enum
+import orjson
 
 from ..core.database import Base
 
 
+def decode_scopes(scopes: Optional[str]) -> List[str]:
+    """Decode stored token scopes; anything but a JSON list reads as none"""
+    if not scopes or not scopes.startswith('['):
+        return []
+    try:
+        return orjson.loads(scopes)
+    except orjson.JSONDecodeError:
+        return []
+
+
 class GitProvider(enum.Enum):
     GITHUB = "github"
     GITLAB = "gitlab"
@@ -40,6 +52,10 @@ class User(Base):
 
 class GitToken(Base):
     __tablename__ = "git_tokens"
+    __table_args__ = (
+        # Every token lookup is scoped to the owner, often with a provider
+        Index("ix_git_tokens_user_provider", "user_id", "provider"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -61,13 +77,22 @@ class GitToken(Base):
     # Relationships
     user = relationship("User", back_populates="git_tokens")
 
+    @property
+    def scopes_list(self) -> List[str]:
+        """Stored scopes decoded from JSON"""
+        return decode_scopes(self.scopes)
+
 
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        # Session revocation updates a user's active tokens
+        Index("ix_refresh_tokens_user_active", "user_id", "is_active"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    token = Column(String, unique=True, index=True, nullable=False)
+    token = Column(String, unique=True, index=True, nullable=False)  # SHA-256 hex digest of the token
     is_active = Column(Boolean, default=True)
     expires_at = Column(DateTime(timezone=True), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -83,6 +108,10 @@ class RefreshToken(Base):
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        # Audit history is read per user, newest first
+        Index("ix_audit_logs_user_created", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -2,6 +2,7 @@ from pydantic import BaseModel, EmailStr, Field, field_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
+import re
 
 
 class GitProvider(str, Enum):
@@ -11,6 +12,10 @@ class GitProvider(str, Enum):
     SSH = "ssh"
 
 
+# ASCII letters and Unicode decimal digits, so a match implies every per-character check below passes
+_STRONG_PASSWORD_RE = re.compile(r'(?=.*[A-Z])(?=.*[a-z])(?=.*\d).{8,}', re.DOTALL)
+
+
 # User schemas
 class UserBase(BaseModel):
     email: EmailStr
@@ -24,6 +29,10 @@ class UserCreate(UserBase):
     @field_validator('password')
     @classmethod
     def validate_password(cls, v):
+        if _STRONG_PASSWORD_RE.match(v):
+            return v
+
+        # Find the specific rule that failed for the error message
         if len(v) < 8:
             raise ValueError('Password must be at least 8 characters long')
         if not any(c.isupper() for c in v):
@@ -67,6 +76,15 @@ class Token(BaseModel):
     expires_in: int  # seconds
 
 
+class TokenVerification(BaseModel):
+    user_id: int = Field(validation_alias="id")
+    username: str
+    is_active: bool
+    is_verified: bool
+
+    model_config = {"from_attributes": True}
+
+
 class TokenData(BaseModel):
     user_id: Optional[int] = None
     username: Optional[str] = None
@@ -78,6 +96,10 @@ class RefreshTokenRequest(BaseModel):
 
 
 # Git Token schemas
+_GITHUB_TOKEN_PREFIXES = ('ghp_', 'gho_', 'ghu_')
+_GITLAB_TOKEN_PREFIXES = ('glpat-', 'glsoat-')
+
+
 class GitTokenBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
     provider: GitProvider
@@ -91,13 +113,13 @@ class GitTokenCreate(GitTokenBase):
     @classmethod
     def validate_token(cls, v, info):
         provider = info.data.get('provider')
-        if provider == GitProvider.GITHUB:
+        if provider is GitProvider.GITHUB:
             # GitHub PAT validation
-            if not v.startswith('ghp_') and not v.startswith('gho_') and not v.startswith('ghu_'):
+            if not v.startswith(_GITHUB_TOKEN_PREFIXES):
                 raise ValueError('Invalid GitHub token format')
-        elif provider == GitProvider.GITLAB:
+        elif provider is GitProvider.GITLAB:
             # GitLab token validation
-            if not v.startswith('glpat-') and not v.startswith('glsoat-'):
+            if not v.startswith(_GITLAB_TOKEN_PREFIXES):
                 raise ValueError('Invalid GitLab token format')
         return v
 
@@ -154,6 +176,14 @@ class AuthResponse(StandardResponse):
     data: Optional[Token] = None
 
 
+class UserMeResponse(StandardResponse):
+    data: Optional[UserResponse] = None
+
+
+class TokenVerifyResponse(StandardResponse):
+    data: Optional[TokenVerification] = None
+
+
 class UserListResponse(StandardResponse):
     data: List[UserResponse]
 
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -33,6 +33,16 @@ class FileBase(BaseModel):
     is_public: bool = Field(default=False, description="Whether the file is publicly accessible")
 
 
+# Maximum encoded content size per file type
+MAX_CONTENT_BYTES = {
+    FileTypeEnum.MERMAID: 100000,  # 100KB for Mermaid files
+    FileTypeEnum.JSON: 1000000,  # 1MB for JSON files
+    FileTypeEnum.MARKDOWN: 500000,  # 500KB for Markdown files
+    FileTypeEnum.PNG: 5000000,  # 5MB for PNG files
+    FileTypeEnum.SVG: 1000000  # 1MB for SVG files
+}
+
+
 class FileCreate(FileBase):
     """Schema for creating new files"""
     file_type: FileTypeEnum = Field(..., description="File type")
@@ -41,29 +51,29 @@ class FileCreate(FileBase):
     diagram_data: Optional[Dict[str, Any]] = Field(None, description="Complete diagram data")
     file_file_metadata: Optional[Dict[str, Any]] = Field(None, description="Additional metadata")
     git_repo_id: Optional[int] = Field(None, description="Associated Git repository ID")
+    git_repository_id: Optional[str] = Field(None, max_length=36, description="Git repository to commit the file to")
     git_path: Optional[str] = Field(None, max_length=500, description="Path in Git repository")
     git_branch: Optional[str] = Field(None, max_length=100, description="Git branch")
 
-    @validator('content')
-    def validate_content(cls, v, values):
+    @field_validator('content')
+    @classmethod
+    def validate_content(cls, v, info):
         """Validate content based on file type"""
-        if 'file_type' in values:
-            file_type = values['file_type']
-            max_size = {
-                'mmd': 100000,  # 100KB for Mermaid files
-                'json': 1000000,  # 1MB for JSON files
-                'md': 500000,  # 500KB for Markdown files
-                'png': 5000000,  # 5MB for PNG files
-                'svg': 1000000  # 1MB for SVG files
-            }
-
-            if len(v.encode('utf-8')) > max_size.get(file_type, 1000000):
+        if 'file_type' in info.data:
+            file_type = info.data['file_type']
+            max_size = MAX_CONTENT_BYTES.get(file_type, 1000000)
+
+            # UTF-8 uses 1-4 bytes per character, so only borderline non-ASCII content needs encoding
+            if len(v) * 4 > max_size and (
+                len(v) > max_size or (not v.isascii() and len(v.encode('utf-8')) > max_size)
+            ):
                 raise ValueError(f"Content too large for {file_type} files")
 
         return v
 
-    @validator('mermaid_code')
-    def validate_mermaid_code(cls, v, values):
+    @field_validator('mermaid_code')
+    @classmethod
+    def validate_mermaid_code(cls, v):
         """Validate Mermaid code if provided"""
         if v and len(v) > 50000:  # 50KB max for Mermaid code
             raise ValueError("Mermaid code too large")
@@ -84,8 +94,8 @@ class FileUpdate(BaseModel):
     file_file_metadata: Optional[Dict[str, Any]] = None
 
 
-class FileResponse(BaseModel):
-    """Schema for file response"""
+class FileSummaryResponse(BaseModel):
+    """Schema for file listings, without the diagram payload columns"""
     id: int
     filename: str
     display_name: str
@@ -93,16 +103,14 @@ class FileResponse(BaseModel):
     file_type: FileTypeEnum
     file_size: int
     file_hash: str
-    mermaid_code: Optional[str]
-    diagram_data: Optional[Dict[str, Any]]
     tags: List[str]
-    file_metadata: Optional[Dict[str, Any]]
     user_id: int
     project_name: Optional[str]
     folder_path: Optional[str]
     is_public: bool
     is_archived: bool
     git_repo_id: Optional[int]
+    git_repository_id: Optional[str] = None
     git_path: Optional[str]
     git_branch: Optional[str]
     git_commit: Optional[str]
@@ -110,13 +118,26 @@ class FileResponse(BaseModel):
     updated_at: datetime
     last_accessed_at: Optional[datetime]
 
-    class Config:
-        from_attributes = True
+    model_config = {"from_attributes": True}
+
+    @classmethod
+    def from_orm_trusted(cls, db_file: Any) -> "FileSummaryResponse":
+        """Build from a loaded DiagramFile row, skipping validation of database-trusted columns"""
+        data = {name: getattr(db_file, name) for name in cls.model_fields}
+        data["file_type"] = FileTypeEnum(data["file_type"].value)
+        return cls.model_construct(**data)
+
+
+class FileResponse(FileSummaryResponse):
+    """Schema for file response"""
+    mermaid_code: Optional[str]
+    diagram_data: Optional[Dict[str, Any]]
+    file_metadata: Optional[Dict[str, Any]]
 
 
 class FileListResponse(BaseModel):
     """Schema for file list response"""
-    files: List[FileResponse]
+    files: List[FileSummaryResponse]
     total: int
     page: int
     per_page: int
@@ -176,8 +197,12 @@ class FileVersionResponse(BaseModel):
     created_by: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = {"from_attributes": True}
+
+    @classmethod
+    def from_orm_trusted(cls, version: Any) -> "FileVersionResponse":
+        """Build from a loaded FileVersion row, skipping validation of database-trusted columns"""
+        return cls.model_construct(**{name: getattr(version, name) for name in cls.model_fields})
 
 
 class FileVersionListResponse(BaseModel):
@@ -200,13 +225,12 @@ class FileShareCreate(BaseModel):
     max_views: Optional[int] = Field(None, ge=1, le=10000)
     max_downloads: Optional[int] = Field(None, ge=1, le=1000)
 
-    @validator('password')
-    def validate_password(cls, v, values):
+    @field_validator('password')
+    @classmethod
+    def validate_password(cls, v):
         """Validate password for password-protected shares"""
         if v and len(v) < 4:
             raise ValueError("Password must be at least 4 characters long")
-        if v and not v:
-            raise ValueError("Password cannot be empty")
         return v
 
 
@@ -230,8 +254,7 @@ class FileShareResponse(BaseModel):
     is_revoked: bool
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = {"from_attributes": True}
 
 
 class FileShareAccessResponse(BaseModel):
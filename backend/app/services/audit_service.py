@@ -0,0 +1,74 @@
+import logging
+import queue
+import threading
+from typing import Any, Dict, List, Optional
+
+from ..core.database import SessionLocal
+from ..models.user import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogWriter:
+    """Buffers audit log rows and inserts them in batches from a background thread"""
+
+    def __init__(self, batch_size: int = 500, flush_interval: float = 0.5, maxsize: int = 10_000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize)
+        self._thread: Optional[threading.Thread] = None
+
+    def enqueue(self, row: Dict[str, Any]) -> None:
+        """Queue an audit row without waiting on the database; drops it if the buffer is full"""
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            logger.warning("Audit log buffer full, dropping %s entry", row.get("action"))
+
+    def start(self) -> None:
+        """Start the background writer"""
+        self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Flush queued rows and stop the background writer"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: List[Dict[str, Any]] = []
+            try:
+                row = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            # Drain whatever else is already waiting, up to one batch
+            while row is not None:
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    row = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            stopping = row is None
+
+            if batch:
+                self._write(batch)
+
+    def _write(self, rows: List[Dict[str, Any]]) -> None:
+        # One executemany INSERT per batch; nothing is read back
+        try:
+            with SessionLocal() as session:
+                session.execute(AuditLog.__table__.insert(), rows)
+                session.commit()
+        except Exception:
+            logger.exception("Failed to write %d audit log entries", len(rows))
+
+
+audit_log_writer = AuditLogWriter()
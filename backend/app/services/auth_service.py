@@ -3,10 +3,9 @@ from sqlalchemy import and_
 from fastapi import HTTPException, status
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
-import httpx
 import re
 
-from ..models.user import User, GitToken, RefreshToken, AuditLog, GitProvider
+from ..models.user import User, GitToken, RefreshToken, GitProvider
 from ..schemas.auth import (
     UserCreate, UserUpdate, TokenData, GitTokenCreate, GitTokenUpdate,
     GitTokenValidation, ChangePassword
@@ -15,9 +14,15 @@ from ..core.security import (
     verify_password, get_password_hash, create_access_token,
     create_refresh_token, verify_token, encrypt_sensitive_data,
     decrypt_sensitive_data, mask_token, validate_password_strength,
-    generate_device_fingerprint
+    generate_device_fingerprint, invalidate_cached_tokens, hash_refresh_token
 )
 from ..core.config import settings
+from .audit_service import audit_log_writer
+
+
+class AuthenticationError(Exception):
+    """Raised when verified token claims cannot be resolved to a user"""
+    pass
 
 
 class AuthService:
@@ -106,11 +111,13 @@ class AuthService:
     def create_user_tokens(
         self,
         user: User,
-        device_info: Optional[Dict[str, Any]] = None,
-        ip_address: Optional[str] = None,
-        user_agent: Optional[str] = None
+        device_info: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """Create access and refresh tokens for user"""
+        device_info = device_info or {}
+        ip_address = device_info.get("ip_address")
+        user_agent = device_info.get("user_agent")
+
         # Create access token
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
@@ -128,7 +135,7 @@ class AuthService:
         # Store refresh token in database
         db_refresh_token = RefreshToken(
             user_id=user.id,
-            token=refresh_token,
+            token=hash_refresh_token(refresh_token),
             expires_at=datetime.utcnow() + refresh_token_expires,
             device_info=str(device_info) if device_info else None,
             ip_address=ip_address,
@@ -166,7 +173,7 @@ class AuthService:
             # Check if refresh token exists in database and is active
             db_refresh_token = self.db.query(RefreshToken).filter(
                 and_(
-                    RefreshToken.token == refresh_token,
+                    RefreshToken.token == hash_refresh_token(refresh_token),
                     RefreshToken.user_id == user_id,
                     RefreshToken.is_active == True,
                     RefreshToken.expires_at > datetime.utcnow()
@@ -212,7 +219,7 @@ class AuthService:
         """Logout user by invalidating refresh token"""
         db_refresh_token = self.db.query(RefreshToken).filter(
             and_(
-                RefreshToken.token == refresh_token,
+                RefreshToken.token == hash_refresh_token(refresh_token),
                 RefreshToken.user_id == user_id
             )
         ).first()
@@ -241,6 +248,7 @@ class AuthService:
         ).update({"is_active": False})
 
         self.db.commit()
+        invalidate_cached_tokens(user_id)
 
         # Log logout all
         self._create_audit_log(
@@ -255,10 +263,15 @@ class AuthService:
 
     def get_current_user(self, token: str) -> User:
         """Get current user from access token"""
-        payload = verify_token(token, "access")
-        user_id = int(payload.get("sub"))
-
-        user = self.db.query(User).filter(User.id == user_id).first()
+        return self.get_user_from_token_payload(verify_token(token, "access"))
+
+    def get_user_from_token_payload(self, payload: Dict[str, Any]) -> User:
+        """Get current user from already verified access token claims"""
+        subject = payload.get("sub")
+        if not isinstance(subject, str) or not subject.isdigit():
+            raise AuthenticationError("Could not validate credentials")
+        # Primary-key lookup: served from the session identity map when the row is already loaded
+        user = self.db.get(User, int(subject))
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -362,6 +375,7 @@ class AuthService:
         ).update({"is_active": False})
 
         self.db.commit()
+        invalidate_cached_tokens(user_id)
 
         # Log password change
         self._create_audit_log(
@@ -387,17 +401,15 @@ class AuthService:
         details: Optional[Dict[str, Any]] = None
     ):
         """Create audit log entry"""
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource=resource,
-            resource_id=resource_id,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            success=success,
-            error_message=error_message,
-            details=str(details) if details else None
-        )
-
-        self.db.add(audit_log)
-        # Don't commit here to avoid interfering with the main transaction
\ No newline at end of file
+        # Written in batches by a background thread so requests never wait on the insert
+        audit_log_writer.enqueue({
+            "user_id": user_id,
+            "action": action,
+            "resource": resource,
+            "resource_id": resource_id,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "success": success,
+            "error_message": error_message,
+            "details": str(details) if details else None
+        })
@@ -5,22 +5,35 @@ import json
 from pathlib import Path
 from typing import Optional, List, Dict, Any, Tuple, BinaryIO
 from datetime import datetime, timezone
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc
+from sqlalchemy.orm import Session, load_only, selectinload
+from sqlalchemy import and_, or_, desc, asc, func, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB, websearch_to_tsquery
 from fastapi import HTTPException, status, UploadFile
 import mimetypes
 import secrets
 import re
 
-from ..models.file import DiagramFile, FileVersion, FileType
+from ..models.file import DiagramFile, FileVersion, FileType, SEARCH_CONFIG, search_document
 from ..models.user import User
 from ..schemas.file import (
-    FileCreate, FileUpdate, FileVersionCreate, FileShareCreate,
+    FileSummaryResponse, FileCreate, FileUpdate, FileVersionCreate, FileShareCreate,
     FileSearchQuery, FileUploadResponse, FileDownloadResponse
 )
 from ..core.config import settings
 from ..core.database import get_db_context
 from ..utils.file_validators import FileValidator
+from ..utils.cache import NamespacedCache
+
+CONTENT_TYPES = {
+    FileType.MERMAID: 'text/plain',
+    FileType.JSON: 'application/json',
+    FileType.MARKDOWN: 'text/markdown',
+    FileType.PNG: 'image/png',
+    FileType.SVG: 'image/svg+xml'
+}
+
+# Live file count per user, the total of every unfiltered listing
+_file_counts = NamespacedCache(maxsize=10_000, ttl=600)
 
 
 class FileStorageService:
@@ -131,6 +144,7 @@ class FileStorageService:
                 folder_path=file_data.folder_path,
                 is_public=file_data.is_public,
                 git_repo_id=file_data.git_repo_id,
+                git_repository_id=file_data.git_repository_id,
                 git_path=file_data.git_path,
                 git_branch=file_data.git_branch,
                 is_versioned=True
@@ -139,6 +153,7 @@ class FileStorageService:
             self.db.add(db_file)
             self.db.commit()
             self.db.refresh(db_file)
+            _file_counts.invalidate(user_id)
 
             # Create initial version
             self._create_file_version(db_file.id, user_id, file_data.content, "Initial version")
@@ -168,7 +183,13 @@ class FileStorageService:
         versions_path = self.base_storage_path / "versions"
         versions_path.mkdir(exist_ok=True)
 
-        version_filename = f"{file_record.filename}_v{file_record.versions.count() + 1}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        # Next version number from one aggregate, without loading the file's version rows
+        latest_version_number = self.db.query(func.max(FileVersion.version_number)).filter(
+            FileVersion.file_id == file_id
+        ).scalar()
+        next_version = (latest_version_number or 0) + 1
+
+        version_filename = f"{file_record.filename}_v{next_version}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         version_path = versions_path / version_filename
 
         try:
@@ -176,13 +197,6 @@ class FileStorageService:
             with open(version_path, 'w', encoding='utf-8') as f:
                 f.write(content)
 
-            # Get next version number
-            latest_version = self.db.query(FileVersion).filter(
-                FileVersion.file_id == file_id
-            ).order_by(desc(FileVersion.version_number)).first()
-
-            next_version = (latest_version.version_number + 1) if latest_version else 1
-
             # Create version record
             db_version = FileVersion(
                 file_id=file_id,
@@ -229,36 +243,35 @@ class FileStorageService:
                 detail="File not found or access denied"
             )
 
-        # Update last accessed time
-        file_record.last_accessed_at = datetime.now(timezone.utc)
+        # Update last accessed time; keeping updated_at in the SET clause stops its
+        # onupdate from firing, so reads do not look like modifications
+        self.db.query(DiagramFile).filter(DiagramFile.id == file_record.id).update(
+            {
+                DiagramFile.last_accessed_at: datetime.now(timezone.utc),
+                DiagramFile.updated_at: DiagramFile.updated_at
+            },
+            synchronize_session=False
+        )
         self.db.commit()
 
         return file_record
 
     def get_file_content(self, file_id: int, user_id: int) -> FileDownloadResponse:
         """Get file content with access control"""
-        file_record = self.get_file(file_id, user_id)
+        return self.read_file_content(self.get_file(file_id, user_id))
 
+    def read_file_content(self, file_record: DiagramFile) -> FileDownloadResponse:
+        """Read the stored content of an already authorized file"""
         try:
             # Read file content
             with open(file_record.file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
 
-            # Determine content type
-            content_type_map = {
-                FileType.MERMAID: 'text/plain',
-                FileType.JSON: 'application/json',
-                FileType.MARKDOWN: 'text/markdown',
-                FileType.PNG: 'image/png',
-                FileType.SVG: 'image/svg+xml'
-            }
-            content_type = content_type_map.get(file_record.file_type, 'text/plain')
-
             return FileDownloadResponse(
                 success=True,
                 message="File retrieved successfully",
                 filename=file_record.filename,
-                content_type=content_type,
+                content_type=self.get_content_type(file_record),
                 content=content,
                 size=file_record.file_size
             )
@@ -274,6 +287,11 @@ class FileStorageService:
                 detail=f"Failed to read file: {str(e)}"
             )
 
+    @staticmethod
+    def get_content_type(file_record: DiagramFile) -> str:
+        """Get the content type served for a file record"""
+        return CONTENT_TYPES.get(file_record.file_type, 'text/plain')
+
     def update_file(self, file_id: int, user_id: int, file_data: FileUpdate) -> DiagramFile:
         """Update an existing file"""
         file_record = self.get_file(file_id, user_id)
@@ -289,7 +307,7 @@ class FileStorageService:
             )
 
         # Update database fields
-        update_data = file_data.dict(exclude_unset=True)
+        update_data = file_data.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             if field == 'content':
                 # Validate new content
@@ -382,26 +400,61 @@ class FileStorageService:
             file_record.deleted_at = datetime.now(timezone.utc)
             self.db.commit()
 
+        _file_counts.invalidate(user_id)
         return True
 
+    def _user_file_count(self, user_id: int) -> int:
+        """Count a user's live files, cached until their next create or delete"""
+        generation = _file_counts.generation(user_id)
+        count = _file_counts.get(user_id, "count")
+        if count is None:
+            count = self.db.query(func.count(DiagramFile.id)).filter(
+                and_(
+                    DiagramFile.user_id == user_id,
+                    DiagramFile.is_deleted == False
+                )
+            ).scalar()
+            _file_counts.set(user_id, "count", count, generation=generation)
+        return count
+
     def list_files(self, user_id: int, query: Optional[FileSearchQuery] = None) -> Tuple[List[DiagramFile], int]:
         """List files for a user with search and filtering"""
-        base_query = self.db.query(DiagramFile).filter(
+        # Without filters the total is the user's cached file count
+        unfiltered = query is None or not (
+            query.query or query.file_types or query.tags or query.project_name
+            or query.is_public is not None or query.date_from or query.date_to
+        )
+
+        # Otherwise the window count returns the grand total alongside each row
+        # of the page; only the columns a listing serializes are fetched
+        entities = (DiagramFile,) if unfiltered else (DiagramFile, func.count().over().label("total"))
+        base_query = self.db.query(*entities).options(
+            load_only(*(getattr(DiagramFile, name) for name in FileSummaryResponse.model_fields))
+        ).filter(
             and_(
                 DiagramFile.user_id == user_id,
                 DiagramFile.is_deleted == False
             )
         )
+        offset = 0
 
         # Apply search and filters
         if query:
+            is_postgresql = self.db.get_bind().dialect.name == "postgresql"
+
             # Text search
             if query.query:
-                search_filter = or_(
-                    DiagramFile.display_name.ilike(f"%{query.query}%"),
-                    DiagramFile.description.ilike(f"%{query.query}%"),
-                    DiagramFile.tags.ilike(f"%{query.query}%")
-                )
+                if is_postgresql:
+                    # Served by the GIN index on search_document
+                    search_filter = search_document.op("@@")(
+                        websearch_to_tsquery(SEARCH_CONFIG, query.query)
+                    )
+                else:
+                    search_filter = or_(
+                        DiagramFile.display_name.ilike(f"%{query.query}%"),
+                        DiagramFile.description.ilike(f"%{query.query}%"),
+                        DiagramFile.tags.ilike(f"%{query.query}%")
+                    )
                 base_query = base_query.filter(search_filter)
 
             # File type filter
@@ -411,8 +464,14 @@ class FileStorageService:
 
             # Tags filter
             if query.tags:
-                for tag in query.tags:
-                    base_query = base_query.filter(DiagramFile.tags.ilike(f"%{tag}%"))
+                if is_postgresql:
+                    # JSONB containment, served by the jsonb_path_ops GIN index
+                    base_query = base_query.filter(
+                        type_coerce(DiagramFile.tags, JSONB).contains(query.tags)
+                    )
+                else:
+                    for tag in query.tags:
+                        base_query = base_query.filter(DiagramFile.tags.ilike(f"%{tag}%"))
 
             # Project filter
             if query.project_name:
@@ -439,8 +498,18 @@ class FileStorageService:
             offset = (query.page - 1) * query.per_page
             base_query = base_query.offset(offset).limit(query.per_page)
 
-        files = base_query.all()
-        total = base_query.count() if not query else base_query.count()
+        if unfiltered:
+            return base_query.all(), self._user_file_count(user_id)
+
+        rows = base_query.all()
+        files = [row.DiagramFile for row in rows]
+        total = rows[0].total if rows else 0
+
+        if not rows and offset:
+            # Past the last page the window sees no rows; count the matches separately
+            total = base_query.limit(None).offset(None).order_by(None).with_entities(
+                func.count(DiagramFile.id)
+            ).scalar()
 
         return files, total
 
@@ -455,6 +524,27 @@ class FileStorageService:
 
         return versions
 
+    def get_file_with_versions(self, file_id: int, user_id: int) -> Tuple[DiagramFile, List[FileVersion]]:
+        """Get a file and its versions (newest first) in a single lookup"""
+        file_record = self.db.query(DiagramFile).options(
+            selectinload(DiagramFile.versions)
+        ).filter(
+            and_(
+                DiagramFile.id == file_id,
+                DiagramFile.user_id == user_id,
+                DiagramFile.is_deleted == False
+            )
+        ).first()
+
+        if not file_record:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="File not found or access denied"
+            )
+
+        versions = sorted(file_record.versions, key=lambda v: v.version_number, reverse=True)
+        return file_record, versions
+
     def get_user_storage_stats(self, user_id: int) -> Dict[str, Any]:
         """Get storage statistics for a user"""
         files = self.db.query(DiagramFile).filter(
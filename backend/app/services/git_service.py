@@ -1,9 +1,11 @@
+import codecs
+import io
 import os
 import shutil
 import tempfile
 import uuid
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, TextIO, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
@@ -580,6 +582,56 @@ class GitService:
         except GitCommandError as e:
             raise GitOperationError(f"Failed to read file: {str(e)}") from e
 
+    def open_file(self, repo_id: str, file_path: str,
+                  commit_hash: Optional[str] = None) -> Tuple[TextIO, int]:
+        """Open a repository file for streaming, returning a text handle and its size in bytes"""
+        repo = self._get_repo(repo_id)
+
+        if repo.bare:
+            raise GitOperationError("Cannot read files from bare repository")
+
+        try:
+            # Validate file path
+            file_full_path = Path(repo.working_dir) / file_path
+            self._validate_path_security(file_full_path)
+
+            if commit_hash:
+                # Read from specific commit
+                commit = repo.commit(commit_hash)
+                try:
+                    blob = commit.tree / file_path
+                except KeyError:
+                    raise GitOperationError(f"File {file_path} not found in commit {commit_hash}")
+                # The blob streams from the repo's shared cat-file process, so drain it now
+                try:
+                    content = blob.data_stream.read().decode('utf-8')
+                except UnicodeDecodeError:
+                    raise GitOperationError(f"File {file_path} is not UTF-8 text")
+                return io.StringIO(content), blob.size
+
+            # Read from working directory
+            if not file_full_path.is_file():
+                raise GitOperationError(f"File {file_path} not found")
+
+            # Callers may stream the handle after sending headers, so reject undecodable files up front
+            self._check_utf8(file_full_path, file_path)
+            return open(file_full_path, 'r', encoding='utf-8'), file_full_path.stat().st_size
+
+        except GitCommandError as e:
+            raise GitOperationError(f"Failed to read file: {str(e)}") from e
+
+    @staticmethod
+    def _check_utf8(path: Path, file_path: str, chunk_size: int = 64 * 1024) -> None:
+        """Raise GitOperationError unless the file decodes as UTF-8, without holding it in memory"""
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        try:
+            with open(path, 'rb') as f:
+                while chunk := f.read(chunk_size):
+                    decoder.decode(chunk)
+            decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            raise GitOperationError(f"File {file_path} is not UTF-8 text")
+
     def write_file(self, repo_id: str, file_path: str, content: str) -> None:
         """Write file content to repository working directory"""
         repo = self._get_repo(repo_id)
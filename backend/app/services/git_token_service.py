@@ -1,15 +1,34 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import Row, and_
 from fastapi import HTTPException, status
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-import httpx
+from functools import lru_cache
+import hashlib
+from http.cookiejar import CookieJar, DefaultCookiePolicy
 import json
 import base64
 
 from ..models.user import GitToken, User, GitProvider
 from ..schemas.auth import GitTokenCreate, GitTokenUpdate, GitTokenValidation
 from ..core.security import encrypt_sensitive_data, decrypt_sensitive_data, mask_token
+from ..utils.cache import TTLCache
+
+# Recent provider validation results, keyed by token digest and provider
+_validation_cache = TTLCache(maxsize=10_000, ttl=60)
+
+
+def _validation_cache_key(token: str, provider: GitProvider) -> tuple:
+    """Cache key that never holds the token itself"""
+    return hashlib.sha256(token.encode()).digest(), provider.value
+
+
+@lru_cache(maxsize=None)
+def _http_client():
+    """Shared HTTP client for provider APIs, importing httpx on first use"""
+    import httpx
+    # Pooled connections are reused across validations; cookies are never kept
+    return httpx.Client(cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])))
 
 
 class GitTokenService:
@@ -69,6 +88,19 @@ class GitTokenService:
 
         return query.all()
 
+    def get_user_git_token_rows(self, user_id: int, active_only: bool = True) -> List[Row]:
+        """Get the columns a token listing needs as plain rows, without loading ORM objects"""
+        query = self.db.query(
+            GitToken.id, GitToken.name, GitToken.provider, GitToken.token, GitToken.scopes,
+            GitToken.is_active, GitToken.created_at, GitToken.updated_at,
+            GitToken.last_used, GitToken.expires_at
+        ).filter(GitToken.user_id == user_id)
+
+        if active_only:
+            query = query.filter(GitToken.is_active == True)
+
+        return query.all()
+
     def get_git_token(self, token_id: int, user_id: int) -> GitToken:
         """Get a specific Git token"""
         token = self.db.query(GitToken).filter(
@@ -122,6 +154,7 @@ class GitTokenService:
         db_token.updated_at = datetime.utcnow()
         self.db.commit()
         self.db.refresh(db_token)
+        self._forget_validation(db_token)
 
         return db_token
 
@@ -131,6 +164,7 @@ class GitTokenService:
 
         self.db.delete(db_token)
         self.db.commit()
+        self._forget_validation(db_token)
 
         return True
 
@@ -159,25 +193,43 @@ class GitTokenService:
         return decrypted_token
 
     def validate_git_token(self, token: str, provider: GitProvider) -> GitTokenValidation:
-        """Validate a Git token with its provider"""
+        """Validate a Git token with its provider, reusing results from the last minute"""
+        cache_key = _validation_cache_key(token, provider)
+        validation = _validation_cache.get(cache_key)
+        if validation is not None:
+            return validation
+
         try:
             if provider == GitProvider.GITHUB:
-                return self._validate_github_token(token)
+                validation = self._validate_github_token(token)
             elif provider == GitProvider.GITLAB:
-                return self._validate_gitlab_token(token)
+                validation = self._validate_gitlab_token(token)
             elif provider == GitProvider.BITBUCKET:
-                return self._validate_bitbucket_token(token)
+                validation = self._validate_bitbucket_token(token)
             else:
                 return GitTokenValidation(
                     is_valid=False,
                     error_message="Provider not supported for validation"
                 )
         except Exception as e:
+            # Failed requests are retried next time rather than cached
             return GitTokenValidation(
                 is_valid=False,
                 error_message=f"Validation failed: {str(e)}"
             )
 
+        # Rejections may be transient (5xx, rate limits) or fixed by the user, so only successes are reused
+        if validation.is_valid:
+            _validation_cache.set(cache_key, validation)
+        return validation
+
+    def _forget_validation(self, db_token: GitToken) -> None:
+        """Drop any cached validation result for a stored token"""
+        try:
+            _validation_cache.pop(_validation_cache_key(decrypt_sensitive_data(db_token.token), db_token.provider))
+        except ValueError:
+            pass
+
     def _validate_github_token(self, token: str) -> GitTokenValidation:
         """Validate GitHub Personal Access Token"""
         headers = {
@@ -185,30 +237,30 @@ class GitTokenService:
             "Accept": "application/vnd.github.v3+json"
         }
 
-        with httpx.Client() as client:
-            # Test authentication by getting user info
-            response = client.get(
-                "https://api.github.com/user",
-                headers=headers,
-                timeout=10.0
-            )
+        client = _http_client()
+        # Test authentication by getting user info
+        response = client.get(
+            "https://api.github.com/user",
+            headers=headers,
+            timeout=10.0
+        )
 
-            if response.status_code == 200:
-                user_data = response.json()
+        if response.status_code == 200:
+            user_data = response.json()
 
-                # Get token metadata if possible
-                scopes = response.headers.get("X-OAuth-Scopes", "").split(",") if response.headers.get("X-OAuth-Scopes") else []
+            # Get token metadata if possible
+            scopes = response.headers.get("X-OAuth-Scopes", "").split(",") if response.headers.get("X-OAuth-Scopes") else []
 
-                return GitTokenValidation(
-                    is_valid=True,
-                    username=user_data.get("login"),
-                    scopes=[s.strip() for s in scopes if s.strip()]
-                )
-            else:
-                return GitTokenValidation(
-                    is_valid=False,
-                    error_message=f"GitHub API error: {response.status_code}"
-                )
+            return GitTokenValidation(
+                is_valid=True,
+                username=user_data.get("login"),
+                scopes=[s.strip() for s in scopes if s.strip()]
+            )
+        else:
+            return GitTokenValidation(
+                is_valid=False,
+                error_message=f"GitHub API error: {response.status_code}"
+            )
 
     def _validate_gitlab_token(self, token: str) -> GitTokenValidation:
         """Validate GitLab Personal Access Token"""
@@ -217,30 +269,30 @@ class GitTokenService:
             "Accept": "application/json"
         }
 
-        with httpx.Client() as client:
-            # Test authentication by getting user info
-            response = client.get(
-                "https://gitlab.com/api/v4/user",
-                headers=headers,
-                timeout=10.0
-            )
+        client = _http_client()
+        # Test authentication by getting user info
+        response = client.get(
+            "https://gitlab.com/api/v4/user",
+            headers=headers,
+            timeout=10.0
+        )
 
-            if response.status_code == 200:
-                user_data = response.json()
+        if response.status_code == 200:
+            user_data = response.json()
 
-                # Extract scopes from token info if available
-                scopes = ["api", "read_api"]  # Default scopes for basic access
+            # Extract scopes from token info if available
+            scopes = ["api", "read_api"]  # Default scopes for basic access
 
-                return GitTokenValidation(
-                    is_valid=True,
-                    username=user_data.get("username"),
-                    scopes=scopes
-                )
-            else:
-                return GitTokenValidation(
-                    is_valid=False,
-                    error_message=f"GitLab API error: {response.status_code}"
-                )
+            return GitTokenValidation(
+                is_valid=True,
+                username=user_data.get("username"),
+                scopes=scopes
+            )
+        else:
+            return GitTokenValidation(
+                is_valid=False,
+                error_message=f"GitLab API error: {response.status_code}"
+            )
 
     def _validate_bitbucket_token(self, token: str) -> GitTokenValidation:
         """Validate Bitbucket App Password"""
@@ -259,27 +311,27 @@ class GitTokenService:
             "Accept": "application/json"
         }
 
-        with httpx.Client() as client:
-            # Test authentication by getting user info
-            response = client.get(
-                "https://api.bitbucket.org/2.0/user",
-                headers=headers,
-                timeout=10.0
-            )
+        client = _http_client()
+        # Test authentication by getting user info
+        response = client.get(
+            "https://api.bitbucket.org/2.0/user",
+            headers=headers,
+            timeout=10.0
+        )
 
-            if response.status_code == 200:
-                user_data = response.json()
+        if response.status_code == 200:
+            user_data = response.json()
 
-                return GitTokenValidation(
-                    is_valid=True,
-                    username=user_data.get("username"),
-                    scopes=["repositories"]  # Bitbucket app passwords have implicit scopes
-                )
-            else:
-                return GitTokenValidation(
-                    is_valid=False,
-                    error_message=f"Bitbucket API error: {response.status_code}"
-                )
+            return GitTokenValidation(
+                is_valid=True,
+                username=user_data.get("username"),
+                scopes=["repositories"]  # Bitbucket app passwords have implicit scopes
+            )
+        else:
+            return GitTokenValidation(
+                is_valid=False,
+                error_message=f"Bitbucket API error: {response.status_code}"
+            )
 
     def get_token_for_git_operation(
         self,
@@ -0,0 +1,110 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a per-entry time-to-live"""
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store value under key for ttl seconds (capped at the cache default)"""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove key and return its value, or default if missing"""
+        with self._lock:
+            item = self._data.pop(key, None)
+        return default if item is None else item[0]
+
+    def discard_where(self, predicate: Callable[[Any], bool]) -> int:
+        """Remove all entries whose value matches predicate"""
+        with self._lock:
+            stale = [key for key, (value, _) in self._data.items() if predicate(value)]
+            for key in stale:
+                del self._data[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class NamespacedCache:
+    """TTL cache whose entries can be invalidated one namespace (e.g. user) at a time"""
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 3600):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Generation numbers are never reused, so a namespace whose generation was
+        # evicted gets a fresh one and misses instead of reviving old entries
+        self._generations = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._counter = itertools.count(1)
+
+    def generation(self, namespace: Hashable) -> int:
+        """Current generation of namespace; take it before loading a value to set"""
+        generation = self._generations.get(namespace)
+        if generation is None:
+            generation = next(self._counter)
+            self._generations.set(namespace, generation)
+        return generation
+
+    def get(self, namespace: Hashable, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key within namespace"""
+        return self._cache.get((namespace, self.generation(namespace), key), default)
+
+    def set(
+        self,
+        namespace: Hashable,
+        key: Hashable,
+        value: Any,
+        ttl: Optional[float] = None,
+        generation: Optional[int] = None
+    ) -> None:
+        """Store value under key within namespace, unless it was invalidated since generation"""
+        current = self.generation(namespace)
+        if generation is not None and generation != current:
+            return
+        self._cache.set((namespace, current, key), value, ttl=ttl)
+
+    def invalidate(self, namespace: Hashable) -> None:
+        """Invalidate every entry in namespace; stale entries age out of the LRU"""
+        self._generations.set(namespace, next(self._counter))
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        self._cache.clear()
+        self._generations.clear()
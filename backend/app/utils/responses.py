@@ -0,0 +1,98 @@
+import os
+from typing import Any, Dict, Iterator, Optional, TextIO
+from urllib.parse import quote
+
+import anyio
+import orjson
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check whether an If-None-Match header covers etag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag.removeprefix("W/")
+    return opaque_tag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+class ZeroCopyFileResponse(FileResponse):
+    """File response using the ASGI zero-copy send extension when the server offers it"""
+
+    def set_stat_headers(self, stat_result: os.stat_result) -> None:
+        # Inode, mtime and size change whenever the file is rewritten
+        self.headers.setdefault(
+            "etag",
+            f'"{stat_result.st_ino:x}-{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+        )
+        super().set_stat_headers(stat_result)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.stat_result is None:
+            try:
+                self.stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+            except FileNotFoundError:
+                raise RuntimeError(f"File at path {self.path} does not exist.")
+            self.set_stat_headers(self.stat_result)
+
+        request_headers = Headers(scope=scope)
+        etag = self.headers["etag"]
+        if etag_matches(request_headers.get("if-none-match"), etag):
+            not_modified = Response(status_code=304, headers={"etag": etag})
+            await not_modified(scope, receive, send)
+            return
+
+        use_zerocopy = (
+            "http.response.zerocopysend" in scope.get("extensions", {})
+            and scope["method"].upper() != "HEAD"
+            and "range" not in request_headers
+        )
+        if not use_zerocopy:
+            # Starlette handles ranges, HEAD, pathsend and chunked reads
+            await super().__call__(scope, receive, send)
+            return
+
+        # The server pipes the open file straight to the socket (e.g. with sendfile)
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        with open(self.path, "rb") as file:
+            await send({"type": "http.response.zerocopysend", "file": file, "more_body": False})
+
+        if self.background is not None:
+            await self.background()
+
+
+class XAccelRedirectResponse(Response):
+    """Empty response telling nginx to serve an internal location itself"""
+
+    def __init__(self, internal_path: str, filename: str, media_type: str) -> None:
+        headers = {"x-accel-redirect": quote(internal_path)}
+        quoted_filename = quote(filename)
+        if quoted_filename != filename:
+            headers["content-disposition"] = f"attachment; filename*=utf-8''{quoted_filename}"
+        else:
+            headers["content-disposition"] = f'attachment; filename="{filename}"'
+        super().__init__(headers=headers, media_type=media_type)
+
+
+def iter_text_chunks(content: str, chunk_size: int = 64 * 1024) -> Iterator[str]:
+    """Yield content in slices of at most chunk_size characters"""
+    for start in range(0, len(content), chunk_size):
+        yield content[start:start + chunk_size]
+
+
+def iter_json_envelope(
+    fields: Dict[str, Any], key: str, handle: TextIO, chunk_size: int = 64 * 1024
+) -> Iterator[bytes]:
+    """Stream fields as a JSON object whose key member is read from handle in chunks"""
+    with handle:
+        head = orjson.dumps(fields)[:-1]
+        if fields:
+            head += b','
+        yield head + orjson.dumps(key) + b':"'
+        while chunk := handle.read(chunk_size):
+            # JSON string escaping is per character, so escaped chunks concatenate cleanly
+            yield orjson.dumps(chunk)[1:-1]
+        yield b'"}'
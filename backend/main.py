@@ -1,16 +1,25 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
 from app.core.database import create_tables
+from app.core.logging_config import setup_logging
 from app.api import api_router
-from app.middleware.security_headers import SecurityHeadersMiddleware, AuditLogMiddleware
+from app.services.audit_service import audit_log_writer
+from app.services.auth_service import AuthenticationError
+from app.services.git_service import (
+    GitServiceError, GitOperationError, InvalidRepositoryError, RepositoryNotFoundError, SecurityError
+)
+from app.middleware.security_headers import SecurityHeadersMiddleware, AuditLogMiddleware, UnhandledErrorMiddleware
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    log_listener = setup_logging()
+    audit_log_writer.start()
     print("🌊 Atlantis API is starting up...")
 
     # Create database tables
@@ -23,6 +32,8 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     print("🌊 Atlantis API is shutting down...")
+    audit_log_writer.stop()
+    log_listener.stop()
 
 
 app = FastAPI(
@@ -32,6 +43,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Innermost, so error responses still get security and CORS headers
+app.add_middleware(UnhandledErrorMiddleware)
+
 # Add security middleware
 app.add_middleware(AuditLogMiddleware)
 app.add_middleware(SecurityHeadersMiddleware)
@@ -39,7 +53,7 @@ app.add_middleware(SecurityHeadersMiddleware)
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.allowed_hosts_list,
+    allow_origins=settings.allowed_hosts_set,
     allow_credentials=settings.CORS_CREDENTIALS,
     allow_methods=settings.CORS_METHODS,
     allow_headers=settings.CORS_HEADERS,
@@ -49,6 +63,32 @@ app.add_middleware(
 app.include_router(api_router, prefix="/api")
 
 
+@app.exception_handler(AuthenticationError)
+async def authentication_error_handler(request: Request, exc: AuthenticationError):
+    return ORJSONResponse(
+        status_code=401,
+        content={"detail": str(exc)},
+        headers={"WWW-Authenticate": "Bearer"}
+    )
+
+
+# Statuses for Git service errors; any other GitServiceError is a 500
+GIT_ERROR_STATUS = {
+    SecurityError: 403,
+    RepositoryNotFoundError: 404,
+    InvalidRepositoryError: 400,
+    GitOperationError: 422,
+}
+
+
+@app.exception_handler(GitServiceError)
+async def git_service_error_handler(request: Request, exc: GitServiceError):
+    return ORJSONResponse(
+        status_code=GIT_ERROR_STATUS.get(type(exc), 500),
+        content={"detail": str(exc)}
+    )
+
+
 @app.get("/")
 async def root():
     return {
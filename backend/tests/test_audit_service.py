@@ -0,0 +1,51 @@
+from unittest.mock import patch
+
+from app.services.audit_service import AuditLogWriter
+
+
+def make_row(action="login"):
+    return {"user_id": 1, "action": action, "resource": "user", "resource_id": "1", "success": True}
+
+
+class TestAuditLogWriter:
+    """Test batched audit log inserts"""
+
+    def test_queued_rows_are_inserted_in_one_batch(self):
+        writer = AuditLogWriter(flush_interval=0.01)
+        for action in ("login", "logout", "password_change"):
+            writer.enqueue(make_row(action))
+
+        with patch("app.services.audit_service.SessionLocal") as session_factory:
+            session = session_factory.return_value.__enter__.return_value
+            writer.start()
+            writer.stop()
+
+        session.execute.assert_called_once()
+        rows = session.execute.call_args.args[1]
+        assert [row["action"] for row in rows] == ["login", "logout", "password_change"]
+        session.commit.assert_called_once()
+
+    def test_batches_are_capped(self):
+        writer = AuditLogWriter(batch_size=2, flush_interval=0.01)
+        for _ in range(5):
+            writer.enqueue(make_row())
+
+        with patch("app.services.audit_service.SessionLocal") as session_factory:
+            session = session_factory.return_value.__enter__.return_value
+            writer.start()
+            writer.stop()
+
+        assert [len(call.args[1]) for call in session.execute.call_args_list] == [2, 2, 1]
+
+    def test_full_buffer_drops_rows(self):
+        writer = AuditLogWriter(maxsize=1)
+        writer.enqueue(make_row("login"))
+        writer.enqueue(make_row("logout"))
+        assert writer._queue.qsize() == 1
+
+    def test_write_failures_are_logged(self):
+        writer = AuditLogWriter()
+        with patch("app.services.audit_service.SessionLocal", side_effect=RuntimeError("db down")), \
+                patch("app.services.audit_service.logger") as logger:
+            writer._write([make_row()])
+        logger.exception.assert_called_once()
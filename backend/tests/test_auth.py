@@ -10,13 +10,17 @@ from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
 
 from main import app
 from app.core.database import get_db, Base
 from app.core.config import settings
 from app.services.auth_service import AuthService
+from app.services import git_token_service
 from app.services.git_token_service import GitTokenService
+from app.middleware.auth import RateLimitMiddleware
 from app.models.user import User, GitToken, GitProvider
+from app.schemas.auth import GitTokenValidation, UserCreate
 
 # Test database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -73,8 +77,7 @@ def auth_headers(test_user_data, db):
 
     tokens = auth_service.create_user_tokens(
         user=user,
-        ip_address="127.0.0.1",
-        user_agent="test-client"
+        device_info={"ip_address": "127.0.0.1", "user_agent": "test-client"}
     )
 
     return {"Authorization": f"Bearer {tokens['access_token']}"}
@@ -265,6 +268,29 @@ class TestAuthentication:
         assert data["data"]["username"] == "testuser"
 
 
+class TestUserCreatePassword:
+    """Test signup password validation"""
+
+    @staticmethod
+    def make_user(password):
+        return UserCreate(email="test@example.com", username="testuser", password=password)
+
+    def test_ascii_password_passes(self):
+        assert self.make_user("TestPassword123").password == "TestPassword123"
+
+    def test_non_ascii_letters_count(self):
+        assert self.make_user("\u00c9COLE\u00e9t\u00e91").password == "\u00c9COLE\u00e9t\u00e91"
+
+    @pytest.mark.parametrize("password, message", [
+        ("testpassword123", "uppercase letter"),
+        ("TESTPASSWORD123", "lowercase letter"),
+        ("TestPassword", "digit"),
+    ])
+    def test_reports_failing_rule(self, password, message):
+        with pytest.raises(ValueError, match=message):
+            self.make_user(password)
+
+
 class TestGitTokens:
     """Test Git token management"""
 
@@ -307,6 +333,63 @@ class TestGitTokens:
         assert response.status_code in [200, 400]
 
 
+class TestGitTokenScopes:
+    """Test decoding of stored token scopes"""
+
+    @pytest.mark.parametrize("stored, expected", [
+        ('["repo", "read:org"]', ["repo", "read:org"]),
+        (None, []),
+        ("", []),
+        ("repo", []),
+        ("[not json", []),
+    ])
+    def test_scopes_list(self, stored, expected):
+        # Read through the property itself; building a GitToken needs every mapper configured
+        assert GitToken.scopes_list.fget(Mock(scopes=stored)) == expected
+
+
+class TestGitTokenValidationCache:
+    """Test caching of provider token validation results"""
+
+    @pytest.fixture(autouse=True)
+    def clear_validation_cache(self):
+        git_token_service._validation_cache.clear()
+        yield
+        git_token_service._validation_cache.clear()
+
+    def test_repeated_validation_skips_provider(self):
+        service = GitTokenService(Mock())
+        validation = GitTokenValidation(is_valid=True, username="testuser", scopes=["repo"])
+
+        with patch.object(GitTokenService, "_validate_github_token", return_value=validation) as provider_call:
+            first = service.validate_git_token("ghp_test_token", GitProvider.GITHUB)
+            second = service.validate_git_token("ghp_test_token", GitProvider.GITHUB)
+
+        assert first.username == second.username == "testuser"
+        assert provider_call.call_count == 1
+
+    def test_provider_errors_are_not_cached(self):
+        service = GitTokenService(Mock())
+
+        with patch.object(GitTokenService, "_validate_github_token", side_effect=OSError("timeout")) as provider_call:
+            assert not service.validate_git_token("ghp_test_token", GitProvider.GITHUB).is_valid
+            assert not service.validate_git_token("ghp_test_token", GitProvider.GITHUB).is_valid
+
+        assert provider_call.call_count == 2
+        assert len(git_token_service._validation_cache) == 0
+
+    def test_provider_rejections_are_not_cached(self):
+        service = GitTokenService(Mock())
+        outage = GitTokenValidation(is_valid=False, error_message="GitHub API error: 503")
+        recovered = GitTokenValidation(is_valid=True, username="testuser", scopes=["repo"])
+
+        with patch.object(GitTokenService, "_validate_github_token", side_effect=[outage, recovered]) as provider_call:
+            assert not service.validate_git_token("ghp_test_token", GitProvider.GITHUB).is_valid
+            assert service.validate_git_token("ghp_test_token", GitProvider.GITHUB).is_valid
+
+        assert provider_call.call_count == 2
+
+
 class TestRateLimiting:
     """Test rate limiting functionality"""
 
@@ -345,6 +428,71 @@ class TestRateLimiting:
         assert response.status_code == 429
 
 
+class TestRateLimitWindow:
+    """Test the in-process sliding window limiter"""
+
+    @staticmethod
+    def make_request(host="10.0.0.1"):
+        return Mock(headers={}, client=Mock(host=host))
+
+    def test_limits_per_client(self):
+        limiter = RateLimitMiddleware()
+        request = self.make_request()
+
+        assert all(limiter.check_rate_limit(request, "register") for _ in range(3))
+        assert not limiter.check_rate_limit(request, "register")
+        assert limiter.check_rate_limit(self.make_request("10.0.0.2"), "register")
+
+    def test_limits_per_endpoint_type(self):
+        limiter = RateLimitMiddleware()
+        request = self.make_request()
+
+        assert all(limiter.check_rate_limit(request, "login") for _ in range(5))
+        assert not limiter.check_rate_limit(request, "login")
+        assert limiter.check_rate_limit(request, "register")
+        assert limiter.get_rate_limit_headers(request, "register")["X-RateLimit-Remaining"] == "2"
+
+    def test_expired_requests_leave_the_window(self):
+        limiter = RateLimitMiddleware()
+        request = self.make_request()
+
+        with patch("app.middleware.auth.time.monotonic", return_value=1000.0):
+            for _ in range(3):
+                limiter.check_rate_limit(request, "register")
+        with patch("app.middleware.auth.time.monotonic", return_value=1600.0):
+            assert limiter.get_rate_limit_headers(request, "register")["X-RateLimit-Remaining"] == "3"
+            assert limiter.check_rate_limit(request, "register")
+
+    def test_sweep_forgets_idle_clients(self):
+        limiter = RateLimitMiddleware()
+
+        with patch("app.middleware.auth.time.monotonic", return_value=limiter._next_sweep - 1):
+            limiter.check_rate_limit(self.make_request("10.0.0.1"), "login")
+        with patch("app.middleware.auth.time.monotonic", return_value=limiter._next_sweep + 3600):
+            limiter.check_rate_limit(self.make_request("10.0.0.2"), "login")
+
+        assert list(limiter.requests) == [("login", "10.0.0.2")]
+
+    def test_sweep_uses_each_endpoint_window(self):
+        limiter = RateLimitMiddleware()
+        request = self.make_request()
+
+        with patch("app.middleware.auth.time.monotonic", return_value=limiter._next_sweep - 1):
+            limiter.check_rate_limit(request, "login")
+            limiter.check_rate_limit(request, "register")
+        with patch("app.middleware.auth.time.monotonic", return_value=limiter._next_sweep + 400):
+            limiter.check_rate_limit(self.make_request("10.0.0.2"), "default")
+
+        assert ("login", "10.0.0.1") not in limiter.requests
+        assert len(limiter.requests[("register", "10.0.0.1")]) == 1
+
+    def test_headers_do_not_track_unseen_clients(self):
+        limiter = RateLimitMiddleware()
+        headers = limiter.get_rate_limit_headers(self.make_request(), "login")
+        assert headers["X-RateLimit-Remaining"] == "5"
+        assert limiter.requests == {}
+
+
 class TestProtectedEndpoints:
     """Test that protected endpoints require authentication"""
 
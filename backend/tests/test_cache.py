@@ -0,0 +1,51 @@
+from app.utils.cache import NamespacedCache
+
+
+class TestNamespacedCache:
+    """Test cases for the namespaced TTL cache"""
+
+    def test_get_and_set(self):
+        cache = NamespacedCache(maxsize=10, ttl=60)
+        cache.set(1, "files", ["a"])
+        assert cache.get(1, "files") == ["a"]
+        assert cache.get(2, "files") is None
+
+    def test_invalidate_only_affects_namespace(self):
+        cache = NamespacedCache(maxsize=10, ttl=60)
+        cache.set(1, "files", ["a"])
+        cache.set(2, "files", ["b"])
+
+        cache.invalidate(1)
+
+        assert cache.get(1, "files") is None
+        assert cache.get(2, "files") == ["b"]
+
+    def test_set_after_invalidate(self):
+        cache = NamespacedCache(maxsize=10, ttl=60)
+        cache.set(1, "files", ["old"])
+        cache.invalidate(1)
+        cache.set(1, "files", ["new"])
+        assert cache.get(1, "files") == ["new"]
+
+    def test_set_skips_value_loaded_before_invalidate(self):
+        cache = NamespacedCache(maxsize=10, ttl=60)
+        generation = cache.generation(1)
+        cache.invalidate(1)
+        cache.set(1, "files", ["stale"], generation=generation)
+        assert cache.get(1, "files") is None
+
+        cache.set(1, "files", ["fresh"], generation=cache.generation(1))
+        assert cache.get(1, "files") == ["fresh"]
+
+    def test_generations_are_bounded(self):
+        cache = NamespacedCache(maxsize=10, ttl=60)
+        for namespace in range(100):
+            cache.invalidate(namespace)
+        assert len(cache._generations) == 10
+
+    def test_evicted_generation_does_not_revive_entries(self):
+        cache = NamespacedCache(maxsize=10, ttl=60)
+        cache.set(1, "files", ["old"])
+        cache.invalidate(1)
+        cache._generations.clear()
+        assert cache.get(1, "files") is None
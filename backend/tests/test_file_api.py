@@ -62,6 +62,7 @@ def sample_file():
     file_mock.is_public = False
     file_mock.is_archived = False
     file_mock.git_repo_id = None
+    file_mock.git_repository_id = None
     file_mock.git_path = None
     file_mock.git_branch = None
     file_mock.git_commit = None
@@ -361,8 +362,7 @@ class TestFileAPI:
         mock_version.id = 1
         mock_version.version_number = 1
         mock_version.change_description = "Initial version"
-        mock_service_instance.get_file_versions.return_value = [mock_version]
-        mock_service_instance.get_file.return_value = Mock()
+        mock_service_instance.get_file_with_versions.return_value = (Mock(), [mock_version])
 
         response = client.get("/api/files/1/versions", headers=auth_headers)
 
@@ -5,13 +5,14 @@ import json
 from pathlib import Path
 from datetime import datetime
 from unittest.mock import Mock, patch
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 
 from app.models.user import User
-from app.models.file import DiagramFile, FileType
-from app.schemas.file import FileCreate, FileUpdate, FileSearchQuery
-from app.services.file_service import FileStorageService
+from app.models.file import DiagramFile, FileVersion, FileType
+from app.schemas.file import FileCreate, FileUpdate, FileSearchQuery, FileResponse, FileSummaryResponse
+from app.services.file_service import FileStorageService, _file_counts
 from app.core.config import settings
 
 
@@ -47,6 +48,21 @@ def file_service(mock_db, temp_storage):
         return FileStorageService(mock_db)
 
 
+@pytest.fixture(autouse=True)
+def clear_file_counts():
+    """Start every test with an empty file count cache"""
+    _file_counts.clear()
+    yield
+    _file_counts.clear()
+
+
+@pytest.fixture
+def summary_load_only():
+    """Skip building load_only options against the partially configured mappers"""
+    with patch('app.services.file_service.load_only') as load_only:
+        yield load_only
+
+
 @pytest.fixture
 def sample_mermaid_content():
     """Sample Mermaid diagram content"""
@@ -265,6 +281,8 @@ class TestFileStorageService:
 
         assert result == mock_file
         file_service.db.commit.assert_called_once()
+        values = file_service.db.query.return_value.filter.return_value.update.call_args.args[0]
+        assert DiagramFile.updated_at in values
 
     def test_get_file_not_found(self, file_service):
         """Test file retrieval with non-existent file"""
@@ -414,31 +432,81 @@ class TestFileStorageService:
         file_service.db.delete.assert_called()
         file_service.db.commit.assert_called()
 
-    def test_list_files_no_filters(self, file_service, mock_user):
+    def test_list_files_no_filters(self, file_service, mock_user, summary_load_only):
         """Test listing files without filters"""
         mock_files = [Mock(spec=DiagramFile) for _ in range(5)]
         mock_query = Mock()
+        mock_query.options.return_value = mock_query
         mock_query.filter.return_value = mock_query
         mock_query.all.return_value = mock_files
-        mock_query.count.return_value = len(mock_files)
+        mock_query.scalar.return_value = 5
         file_service.db.query.return_value = mock_query
 
         files, total = file_service.list_files(1)
 
-        assert len(files) == 5
+        assert files == mock_files
         assert total == 5
+        loaded = {column.key for column in summary_load_only.call_args.args}
+        assert loaded.isdisjoint({"mermaid_code", "diagram_data", "file_metadata"})
         mock_query.filter.assert_called()
+        mock_query.count.assert_not_called()
+
+    def test_list_files_unfiltered_count_is_cached(self, file_service, mock_user, summary_load_only):
+        """Test that unfiltered listings reuse the cached count until a delete"""
+        mock_file = Mock(spec=DiagramFile, user_id=1, file_path="/path/to/file")
+        mock_query = Mock()
+        mock_query.options.return_value = mock_query
+        mock_query.filter.return_value = mock_query
+        mock_query.order_by.return_value = mock_query
+        mock_query.offset.return_value = mock_query
+        mock_query.limit.return_value = mock_query
+        mock_query.all.return_value = [mock_file]
+        mock_query.first.return_value = mock_file
+        mock_query.scalar.return_value = 1
+        file_service.db.query.return_value = mock_query
+
+        file_service.list_files(1, FileSearchQuery(page=1))
+        _, total = file_service.list_files(1, FileSearchQuery(page=2))
+        assert total == 1
+        assert mock_query.scalar.call_count == 1
+
+        file_service.delete_file(1, 1)
+        mock_query.scalar.return_value = 0
+        _, total = file_service.list_files(1)
+        assert total == 0
+        assert mock_query.scalar.call_count == 2
+
+    def test_count_read_during_a_delete_is_not_cached(self, file_service, mock_user, summary_load_only):
+        """Test that a count loaded before a concurrent delete is not stored"""
+        mock_query = Mock()
+        mock_query.options.return_value = mock_query
+        mock_query.filter.return_value = mock_query
+        mock_query.order_by.return_value = mock_query
+        mock_query.offset.return_value = mock_query
+        mock_query.limit.return_value = mock_query
+        mock_query.all.return_value = []
+
+        def count_then_delete():
+            _file_counts.invalidate(1)
+            return 1
 
-    def test_list_files_with_search(self, file_service, mock_user):
+        mock_query.scalar.side_effect = count_then_delete
+        file_service.db.query.return_value = mock_query
+
+        file_service.list_files(1)
+        file_service.list_files(1)
+        assert mock_query.scalar.call_count == 2
+
+    def test_list_files_with_search(self, file_service, mock_user, summary_load_only):
         """Test listing files with search query"""
         mock_files = [Mock(spec=DiagramFile)]
         mock_query = Mock()
+        mock_query.options.return_value = mock_query
         mock_query.filter.return_value = mock_query
         mock_query.order_by.return_value = mock_query
         mock_query.offset.return_value = mock_query
         mock_query.limit.return_value = mock_query
-        mock_query.all.return_value = mock_files
-        mock_query.count.return_value = 1
+        mock_query.all.return_value = [Mock(DiagramFile=f, total=1) for f in mock_files]
         file_service.db.query.return_value = mock_query
 
         search_query = FileSearchQuery(
@@ -450,9 +518,91 @@ class TestFileStorageService:
 
         files, total = file_service.list_files(1, search_query)
 
-        assert len(files) == 1
+        assert files == mock_files
         assert total == 1
 
+    def test_list_files_search_uses_full_text_on_postgresql(self, file_service, mock_user, summary_load_only):
+        """Test that search text becomes a tsquery match on PostgreSQL"""
+        mock_query = Mock()
+        mock_query.options.return_value = mock_query
+        mock_query.filter.return_value = mock_query
+        mock_query.order_by.return_value = mock_query
+        mock_query.offset.return_value = mock_query
+        mock_query.limit.return_value = mock_query
+        mock_query.all.return_value = []
+        file_service.db.query.return_value = mock_query
+        file_service.db.get_bind.return_value.dialect.name = "postgresql"
+
+        file_service.list_files(1, FileSearchQuery(query="auth flow"))
+
+        search_filter = mock_query.filter.call_args_list[1].args[0]
+        sql = str(search_filter.compile(dialect=postgresql.dialect()))
+        assert "@@ websearch_to_tsquery('english'" in sql
+        assert "ILIKE" not in sql.upper()
+
+    def test_list_files_tags_use_containment_on_postgresql(self, file_service, mock_user, summary_load_only):
+        """Test that tag filters become one JSONB containment check on PostgreSQL"""
+        mock_query = Mock()
+        mock_query.options.return_value = mock_query
+        mock_query.filter.return_value = mock_query
+        mock_query.order_by.return_value = mock_query
+        mock_query.offset.return_value = mock_query
+        mock_query.limit.return_value = mock_query
+        mock_query.all.return_value = []
+        file_service.db.query.return_value = mock_query
+        file_service.db.get_bind.return_value.dialect.name = "postgresql"
+
+        file_service.list_files(1, FileSearchQuery(tags=["arch", "auth"]))
+
+        assert mock_query.filter.call_count == 2
+        tags_filter = mock_query.filter.call_args_list[1].args[0]
+        assert str(tags_filter.compile(dialect=postgresql.dialect())) == "diagram_files.tags @> %(param_1)s::JSONB"
+
+    def test_list_files_page_out_of_range(self, file_service, mock_user, summary_load_only):
+        """Test listing files past the last page still reports the total"""
+        mock_query = Mock()
+        mock_query.options.return_value = mock_query
+        mock_query.filter.return_value = mock_query
+        mock_query.order_by.return_value = mock_query
+        mock_query.offset.return_value = mock_query
+        mock_query.limit.return_value = mock_query
+        mock_query.with_entities.return_value = mock_query
+        mock_query.all.return_value = []
+        mock_query.scalar.return_value = 3
+        file_service.db.query.return_value = mock_query
+
+        files, total = file_service.list_files(1, FileSearchQuery(project_name="atlas", page=5, per_page=10))
+
+        assert files == []
+        assert total == 3
+
+    def test_get_file_with_versions(self, file_service, mock_user):
+        """Test loading a file together with its versions, newest first"""
+        versions = [Mock(spec=FileVersion, version_number=n) for n in (1, 3, 2)]
+        mock_file = Mock(spec=DiagramFile, versions=versions)
+        mock_query = Mock()
+        mock_query.options.return_value = mock_query
+        mock_query.filter.return_value = mock_query
+        mock_query.first.return_value = mock_file
+        file_service.db.query.return_value = mock_query
+
+        with patch('app.services.file_service.selectinload'):
+            file_record, ordered = file_service.get_file_with_versions(1, 1)
+
+        assert file_record is mock_file
+        assert [v.version_number for v in ordered] == [3, 2, 1]
+        file_service.db.query.assert_called_once()
+
+    def test_get_file_with_versions_not_found(self, file_service, mock_user):
+        """Test loading versions of a missing file"""
+        file_service.db.query.return_value.options.return_value.filter.return_value.first.return_value = None
+
+        with patch('app.services.file_service.selectinload'):
+            with pytest.raises(HTTPException) as exc_info:
+                file_service.get_file_with_versions(999, 1)
+
+        assert exc_info.value.status_code == 404
+
     def test_get_user_storage_stats(self, file_service, mock_user):
         """Test user storage statistics"""
         mock_files = [
@@ -497,4 +647,50 @@ class TestFileStorageService:
         assert version.file_id == 1
         assert version.version_number == 1
         assert version.change_description == "Test version"
-        file_service.db.add.assert_called_once()
\ No newline at end of file
+        file_service.db.add.assert_called_once()
+
+
+class TestTrustedFileResponses:
+    """Test building file responses from database rows without validation"""
+
+    @pytest.fixture
+    def db_file(self):
+        row = Mock(spec=DiagramFile)
+        for name in FileResponse.model_fields:
+            setattr(row, name, None)
+        row.id = 1
+        row.filename = "diagram.mmd"
+        row.display_name = "Diagram"
+        row.file_type = FileType.MERMAID
+        row.file_size = 10
+        row.file_hash = "abc123"
+        row.tags = ["test"]
+        row.user_id = 1
+        row.is_public = False
+        row.is_archived = False
+        row.created_at = datetime(2024, 1, 1)
+        row.updated_at = datetime(2024, 1, 2)
+        return row
+
+    @pytest.mark.parametrize("schema", [FileSummaryResponse, FileResponse])
+    def test_matches_validated_output(self, schema, db_file):
+        trusted = schema.from_orm_trusted(db_file)
+        assert trusted.model_dump_json() == schema.model_validate(db_file).model_dump_json()
+        assert trusted.file_type.value == "mmd"
+
+
+class TestFileCreateContentSize:
+    """Test the per-type content size limit"""
+
+    @staticmethod
+    def make_file(content):
+        return FileCreate(display_name="Diagram", file_type="mmd", content=content)
+
+    @pytest.mark.parametrize("content", ["a" * 100000, "é" * 50000, "\U0001F600" * 25000])
+    def test_content_at_limit_is_accepted(self, content):
+        assert self.make_file(content).content == content
+
+    @pytest.mark.parametrize("content", ["a" * 100001, "é" * 50001, "\U0001F600" * 25001])
+    def test_content_over_limit_is_rejected(self, content):
+        with pytest.raises(ValueError, match="Content too large"):
+            self.make_file(content)
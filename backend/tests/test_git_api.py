@@ -1,10 +1,16 @@
 import pytest
+import asyncio
+import io
 import json
+import time
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
 
 from main import app
+from app.api.git import _CommitPageBatcher
+from app.middleware.auth import get_current_active_user
 from app.services.git_service import (
+    GitService,
     GitServiceError,
     RepositoryNotFoundError,
     InvalidRepositoryError,
@@ -26,6 +32,13 @@ class TestGitAPI:
         with patch('app.api.git.git_service') as mock:
             yield mock
 
+    @pytest.fixture
+    def authenticated(self):
+        """Authenticate requests as a stub user"""
+        app.dependency_overrides[get_current_active_user] = lambda: MagicMock(id=1)
+        yield
+        app.dependency_overrides.pop(get_current_active_user, None)
+
     def test_get_repositories_empty(self, mock_git_service):
         """Test getting repositories when none exist"""
         mock_git_service.list_repositories.return_value = []
@@ -131,7 +144,7 @@ class TestGitAPI:
             init_bare=False
         )
 
-    def test_create_repository_invalid_data(self, mock_git_service):
+    def test_create_repository_invalid_data(self, mock_git_service, authenticated):
         """Test creating repository with invalid data"""
         request_data = {
             "name": "",  # Empty name should fail
@@ -224,6 +237,13 @@ class TestGitAPI:
             "test-id", branch="feature", limit=10, skip=5
         )
 
+    def test_get_commits_rejects_out_of_range_paging(self, mock_git_service):
+        """Test that negative skips and oversized pages are rejected"""
+        assert client.get("/api/git/repositories/test-id/commits?skip=-10").status_code == 422
+        assert client.get("/api/git/repositories/test-id/commits?limit=0").status_code == 422
+        assert client.get("/api/git/repositories/test-id/commits?limit=100000").status_code == 422
+        mock_git_service.get_commits.assert_not_called()
+
     def test_get_commit_details(self, mock_git_service):
         """Test getting detailed commit information"""
         mock_commit = GitCommitInfo(
@@ -337,7 +357,7 @@ class TestGitAPI:
 
     def test_read_file(self, mock_git_service):
         """Test reading a file"""
-        mock_git_service.read_file.return_value = "file content"
+        mock_git_service.open_file.return_value = (io.StringIO("file content"), 12)
 
         response = client.get("/api/git/repositories/test-id/files/path/to/file.txt")
         assert response.status_code == 200
@@ -345,11 +365,11 @@ class TestGitAPI:
         data = response.json()
         assert data["content"] == "file content"
 
-        mock_git_service.read_file.assert_called_once_with("test-id", "path/to/file.txt", None)
+        mock_git_service.open_file.assert_called_once_with("test-id", "path/to/file.txt", commit_hash=None)
 
     def test_read_file_from_commit(self, mock_git_service):
         """Test reading a file from a specific commit"""
-        mock_git_service.read_file.return_value = "old file content"
+        mock_git_service.open_file.return_value = (io.StringIO("old file content"), 16)
 
         response = client.get("/api/git/repositories/test-id/files/path/to/file.txt?commit_hash=abc123")
         assert response.status_code == 200
@@ -357,7 +377,17 @@ class TestGitAPI:
         data = response.json()
         assert data["content"] == "old file content"
 
-        mock_git_service.read_file.assert_called_once_with("test-id", "path/to/file.txt", "abc123")
+        mock_git_service.open_file.assert_called_once_with("test-id", "path/to/file.txt", commit_hash="abc123")
+
+    def test_read_large_file_is_streamed(self, mock_git_service):
+        """Test that large files are streamed in the same JSON shape"""
+        content = "graph TD\n    A --> B\n" * 20000
+        mock_git_service.open_file.return_value = (io.StringIO(content), len(content))
+
+        response = client.get("/api/git/repositories/test-id/files/large.mmd")
+        assert response.status_code == 200
+        assert "content-length" not in response.headers
+        assert response.json() == {"content": content}
 
     def test_write_file(self, mock_git_service):
         """Test writing a file"""
@@ -488,6 +518,111 @@ class TestGitAPI:
         assert "Pull operations are disabled" in response.json()["detail"]
 
 
+class TestCommitPageBatcher:
+    """Test cases for coalescing concurrent commit page requests"""
+
+    def test_concurrent_pages_share_one_walk(self):
+        """Test that overlapping pages are served from a single history walk"""
+        commits = [f"commit-{i}" for i in range(30)]
+
+        async def fetch_pages():
+            batcher = _CommitPageBatcher()
+            return await asyncio.gather(
+                batcher.get_commits("test-id", None, 10, 0),
+                batcher.get_commits("test-id", None, 10, 10),
+                batcher.get_commits("test-id", None, 5, 20)
+            )
+
+        with patch('app.api.git.git_service') as mock_git_service:
+            mock_git_service.get_commits.return_value = commits[:25]
+            first, second, third = asyncio.run(fetch_pages())
+
+        mock_git_service.get_commits.assert_called_once_with(
+            "test-id", branch=None, limit=25, skip=0
+        )
+        assert first == commits[:10]
+        assert second == commits[10:20]
+        assert third == commits[20:25]
+
+    def test_disjoint_pages_are_walked_separately(self):
+        """Test that pages far apart are not merged into one long walk"""
+        async def fetch_pages():
+            batcher = _CommitPageBatcher()
+            return await asyncio.gather(
+                batcher.get_commits("test-id", None, 50, 0),
+                batcher.get_commits("test-id", None, 50, 5000)
+            )
+
+        with patch('app.api.git.git_service') as mock_git_service:
+            mock_git_service.get_commits.side_effect = lambda repo_id, branch, limit, skip: [skip] * limit
+            first, second = asyncio.run(fetch_pages())
+
+        assert sorted(call.kwargs["skip"] for call in mock_git_service.get_commits.call_args_list) == [0, 5000]
+        assert all(call.kwargs["limit"] == 50 for call in mock_git_service.get_commits.call_args_list)
+        assert first == [0] * 50
+        assert second == [5000] * 50
+
+    def test_requests_during_a_walk_share_the_next_one(self):
+        """Test that pages requested while a walk runs are batched into the following walk"""
+        async def fetch_pages():
+            batcher = _CommitPageBatcher()
+            first = asyncio.ensure_future(batcher.get_commits("test-id", None, 10, 0))
+            await asyncio.sleep(0.01)
+            rest = await asyncio.gather(
+                batcher.get_commits("test-id", None, 10, 10),
+                batcher.get_commits("test-id", None, 10, 20)
+            )
+            return [await first, *rest]
+
+        def walk(repo_id, branch, limit, skip):
+            time.sleep(0.05)
+            return list(range(skip, skip + limit))
+
+        with patch('app.api.git.git_service') as mock_git_service:
+            mock_git_service.get_commits.side_effect = walk
+            pages = asyncio.run(fetch_pages())
+
+        assert [call.kwargs for call in mock_git_service.get_commits.call_args_list] == [
+            {"branch": None, "limit": 10, "skip": 0},
+            {"branch": None, "limit": 20, "skip": 10}
+        ]
+        assert pages == [list(range(0, 10)), list(range(10, 20)), list(range(20, 30))]
+
+    def test_negative_skip_does_not_shift_other_pages(self):
+        """Test that an out-of-range page cannot move the offset of a page it is merged with"""
+        commits = [f"commit-{i}" for i in range(60)]
+
+        async def fetch_pages():
+            batcher = _CommitPageBatcher()
+            return await asyncio.gather(
+                batcher.get_commits("test-id", None, 50, -10),
+                batcher.get_commits("test-id", None, 5, 0)
+            )
+
+        with patch('app.api.git.git_service') as mock_git_service:
+            mock_git_service.get_commits.side_effect = lambda repo_id, branch, limit, skip: commits[skip:skip + limit]
+            first, second = asyncio.run(fetch_pages())
+
+        assert first == commits[:50]
+        assert second == commits[:5]
+
+    def test_errors_reach_every_caller(self):
+        """Test that a failed walk raises for every coalesced request"""
+        async def fetch_pages():
+            batcher = _CommitPageBatcher()
+            return await asyncio.gather(
+                batcher.get_commits("test-id", "main", 10, 0),
+                batcher.get_commits("test-id", "main", 10, 10),
+                return_exceptions=True
+            )
+
+        with patch('app.api.git.git_service') as mock_git_service:
+            mock_git_service.get_commits.side_effect = GitOperationError("Branch 'main' not found")
+            results = asyncio.run(fetch_pages())
+
+        assert all(isinstance(result, GitOperationError) for result in results)
+
+
 class TestGitAPIIntegration:
     """Integration tests for Git API with real Git operations"""
 
@@ -597,4 +732,16 @@ class TestGitAPIIntegration:
 
                 # Delete repository
                 delete_response = client.delete(f"/api/git/repositories/{repo_id}")
-                assert delete_response.status_code == 200
\ No newline at end of file
+                assert delete_response.status_code == 200
+
+    def test_read_large_non_utf8_file(self, tmp_path):
+        """Test that a large binary file gets an error status instead of a broken stream"""
+        real_git_service = GitService(base_path=str(tmp_path))
+        repo_info = real_git_service.create_repository("binary-test")
+        (tmp_path / repo_info.id / "image.png").write_bytes(b"\x89PNG\r\n" + b"\x00" * 300_000 + b"\xff")
+
+        with patch('app.api.git.git_service', real_git_service):
+            response = client.get(f"/api/git/repositories/{repo_info.id}/files/image.png")
+
+        assert response.status_code == 422
+        assert "not UTF-8" in response.json()["detail"]
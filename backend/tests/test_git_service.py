@@ -308,6 +308,38 @@ class TestGitService:
         with pytest.raises(GitOperationError):
             git_service.read_file(sample_repo.id, "non-existent.txt")
 
+    def test_open_file(self, git_service, sample_repo):
+        """Test opening a file for streaming from the working tree and a commit"""
+        git_service.write_file(sample_repo.id, "test.txt", "test content")
+        commit_hash = git_service.create_commit(sample_repo.id, "Add test file", ["test.txt"])
+        git_service.write_file(sample_repo.id, "test.txt", "new content")
+
+        handle, size = git_service.open_file(sample_repo.id, "test.txt")
+        with handle:
+            assert handle.read() == "new content"
+        assert size == len("new content")
+
+        handle, size = git_service.open_file(sample_repo.id, "test.txt", commit_hash)
+        with handle:
+            assert handle.read() == "test content"
+        assert size == len("test content")
+
+    def test_open_file_not_found(self, git_service, sample_repo):
+        """Test opening a non-existent file"""
+        with pytest.raises(GitOperationError):
+            git_service.open_file(sample_repo.id, "non-existent.txt")
+
+    def test_open_large_non_utf8_file(self, git_service, sample_repo):
+        """Test that an undecodable file is rejected before it can be streamed"""
+        repo_path = Path(git_service.base_path) / sample_repo.id
+        (repo_path / "image.png").write_bytes(b"\x89PNG\r\n" + b"a" * 300_000 + b"\xff\xfe")
+        commit_hash = git_service.create_commit(sample_repo.id, "Add image", ["image.png"])
+
+        with pytest.raises(GitOperationError, match="not UTF-8"):
+            git_service.open_file(sample_repo.id, "image.png")
+        with pytest.raises(GitOperationError, match="not UTF-8"):
+            git_service.open_file(sample_repo.id, "image.png", commit_hash)
+
     def test_write_file(self, git_service, sample_repo):
         """Test writing a file"""
         git_service.write_file(sample_repo.id, "test.txt", "test content")
@@ -461,4 +493,38 @@ class TestGitServiceIntegration:
         branches = git_service.get_branches(repo_info.id)
         assert "main" in branches
         assert "feature1" in branches
-        assert "feature2" in branches
\ No newline at end of file
+        assert "feature2" in branches
+
+    def test_file_sync_commits_to_repository(self, git_service, tmp_path):
+        """Test the background sync of a stored diagram into its repository"""
+        from app.api.files import _sync_file_to_git
+
+        repo_info = git_service.create_repository("diagram-sync")
+        source = tmp_path / "diagram.mmd"
+        source.write_text("graph TD\n    A --> B", encoding="utf-8")
+
+        with patch("app.api.files.GitService", return_value=git_service):
+            _sync_file_to_git(repo_info.id, str(source), "diagrams/flow.mmd", "Add diagram: Flow")
+
+        assert git_service.read_file(repo_info.id, "diagrams/flow.mmd") == "graph TD\n    A --> B"
+        assert git_service.get_commits(repo_info.id)[0].message == "Add diagram: Flow"
+
+    def test_queued_file_sync_runs_on_the_git_pool(self):
+        """Test that queued syncs run on the dedicated Git pool, not the request thread pool"""
+        import asyncio
+        import threading
+        from app.api.files import _queue_git_sync
+
+        ran = threading.Event()
+        thread_names = []
+
+        def record(*args):
+            thread_names.append(threading.current_thread().name)
+            ran.set()
+
+        with patch("app.api.files._sync_file_to_git", side_effect=record) as sync:
+            asyncio.run(_queue_git_sync("repo-id", "/tmp/source.mmd", "flow.mmd", "Add diagram: Flow"))
+            assert ran.wait(5)
+
+        sync.assert_called_once_with("repo-id", "/tmp/source.mmd", "flow.mmd", "Add diagram: Flow")
+        assert thread_names[0].startswith("git-sync")
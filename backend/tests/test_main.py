@@ -1,4 +1,6 @@
+import json
 import pytest
+from unittest.mock import patch
 from fastapi.testclient import TestClient
 from main import app
 
@@ -51,6 +53,142 @@ def test_create_diagram():
     assert "id" in data["data"]
 
 
+def test_update_diagram():
+    """Test partially updating a diagram"""
+    response = client.post("/api/diagrams/", json={
+        "title": "Original Title",
+        "description": "Original description",
+        "mermaid_code": "graph TD\n    A --> B"
+    })
+    diagram_id = response.json()["data"]["id"]
+
+    response = client.put(f"/api/diagrams/{diagram_id}", json={"title": "Updated Title"})
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data["title"] == "Updated Title"
+    assert data["description"] == "Original description"
+
+    response = client.get(f"/api/diagrams/{diagram_id}")
+    assert response.json()["data"]["title"] == "Updated Title"
+
+
+def test_export_diagram_json():
+    """Test exporting a diagram as JSON"""
+    response = client.post("/api/diagrams/", json={
+        "title": "Exported Diagram",
+        "mermaid_code": "graph TD\n    A --> B"
+    })
+    diagram = response.json()["data"]
+
+    response = client.get(f"/api/diagrams/{diagram['id']}/export", params={"format": "json"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["id"] == diagram["id"]
+    assert response.json()["mermaid_code"] == "graph TD\n    A --> B"
+
+
+def test_get_diagram_conditional():
+    """Test ETag-based conditional GET for a diagram"""
+    response = client.post("/api/diagrams/", json={
+        "title": "Cached Diagram",
+        "mermaid_code": "graph TD\n    A --> B"
+    })
+    diagram_id = response.json()["data"]["id"]
+
+    response = client.get(f"/api/diagrams/{diagram_id}")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    response = client.get(f"/api/diagrams/{diagram_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    client.put(f"/api/diagrams/{diagram_id}", json={"title": "Changed"})
+    response = client.get(f"/api/diagrams/{diagram_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+    export = client.get(f"/api/diagrams/{diagram_id}/export", params={"format": "markdown"})
+    assert export.status_code == 200
+    response = client.get(
+        f"/api/diagrams/{diagram_id}/export",
+        params={"format": "markdown"},
+        headers={"If-None-Match": export.headers["etag"]}
+    )
+    assert response.status_code == 304
+
+
+def test_delete_diagram():
+    """Test deleting a diagram and looking up missing diagrams"""
+    response = client.post("/api/diagrams/", json={
+        "title": "Disposable Diagram",
+        "mermaid_code": "graph TD\n    A --> B"
+    })
+    diagram_id = response.json()["data"]["id"]
+
+    response = client.delete(f"/api/diagrams/{diagram_id}")
+    assert response.status_code == 200
+
+    assert client.delete(f"/api/diagrams/{diagram_id}").status_code == 404
+    assert client.get(f"/api/diagrams/{diagram_id}").status_code == 404
+    assert client.put(f"/api/diagrams/{diagram_id}", json={"title": "Gone"}).status_code == 404
+    assert client.get(f"/api/diagrams/{diagram_id}/export").status_code == 404
+
+
+def test_diagrams_pagination():
+    """Test paging through the diagrams list"""
+    for i in range(3):
+        client.post("/api/diagrams/", json={
+            "title": f"Paged Diagram {i}",
+            "mermaid_code": "graph TD\n    A --> B"
+        })
+
+    response = client.get("/api/diagrams/", params={"limit": 2})
+    assert response.status_code == 200
+    assert len(response.json()["data"]) == 2
+
+    total = len(client.get("/api/diagrams/", params={"limit": 1000}).json()["data"])
+    response = client.get("/api/diagrams/", params={"offset": total - 1})
+    assert len(response.json()["data"]) == 1
+
+    response = client.get("/api/diagrams/", params={"limit": 0})
+    assert response.status_code == 422
+
+
+def test_stream_diagrams():
+    """Test streaming diagrams as NDJSON with a field projection"""
+    client.post("/api/diagrams/", json={
+        "title": "Streamed Diagram",
+        "mermaid_code": "graph TD\n    A --> B"
+    })
+
+    response = client.get("/api/diagrams/stream", params={"fields": "id,title"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows
+    assert all(set(row) == {"id", "title"} for row in rows)
+    assert "Streamed Diagram" in [row["title"] for row in rows]
+
+    response = client.get("/api/diagrams/stream", params={"fields": "id,secret"})
+    assert response.status_code == 400
+
+
+def test_unhandled_error_response():
+    """Test that unexpected errors return a generic 500 response a browser can read"""
+    failing_client = TestClient(app, raise_server_exceptions=False)
+
+    with patch("app.api.diagrams.diagrams_db") as mock_db:
+        mock_db.values.side_effect = RuntimeError("database password is hunter2")
+        response = failing_client.get("/api/diagrams/", headers={"Origin": "http://localhost:3000"})
+
+    assert response.status_code == 500
+    assert response.json() == {"success": False, "message": "Internal server error"}
+    assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+    assert response.headers["x-content-type-options"] == "nosniff"
+
+
 def test_git_api():
     """Test the Git API endpoints"""
     # Test getting empty repositories list
@@ -67,4 +205,18 @@ def test_users_api():
     assert response.status_code == 200
     data = response.json()
     assert data["success"] is True
-    assert data["data"]["username"] == "demo_user"
\ No newline at end of file
+    assert data["data"]["username"] == "demo_user"
+
+
+def test_security_headers():
+    """Test that security headers are added once per response"""
+    with patch("app.middleware.security_headers.settings.ENABLE_SECURITY_HEADERS", True), \
+            patch("app.middleware.security_headers.settings.ENVIRONMENT", "development"):
+        response = client.get("/health")
+
+    assert response.headers["x-frame-options"] == "DENY"
+    assert response.headers.get_list("content-security-policy") == [
+        response.headers["content-security-policy"]
+    ]
+    assert "frame-ancestors 'none'" in response.headers["content-security-policy"]
+    assert "strict-transport-security" not in response.headers
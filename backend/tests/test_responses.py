@@ -0,0 +1,132 @@
+import asyncio
+import io
+import json
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.utils.responses import (
+    XAccelRedirectResponse, ZeroCopyFileResponse, etag_matches, iter_json_envelope, iter_text_chunks
+)
+
+
+@pytest.fixture
+def diagram_file(tmp_path):
+    path = tmp_path / "diagram.mmd"
+    path.write_text("graph TD\n    A --> B\n")
+    return path
+
+
+@pytest.fixture
+def client(diagram_file):
+    async def download(request):
+        return ZeroCopyFileResponse(path=diagram_file, filename="diagram.mmd", media_type="text/plain")
+
+    return TestClient(Starlette(routes=[Route("/download", download)]))
+
+
+class TestZeroCopyFileResponse:
+    """Test cases for the zero-copy file response"""
+
+    def test_falls_back_to_regular_file_response(self, client, diagram_file):
+        response = client.get("/download")
+
+        assert response.status_code == 200
+        assert response.content == diagram_file.read_bytes()
+        assert response.headers["content-length"] == str(diagram_file.stat().st_size)
+        assert 'filename="diagram.mmd"' in response.headers["content-disposition"]
+
+    def test_matching_etag_returns_not_modified(self, client):
+        etag = client.get("/download").headers["etag"]
+
+        response = client.get("/download", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_etag_changes_when_file_is_rewritten(self, client, diagram_file):
+        etag = client.get("/download").headers["etag"]
+        diagram_file.write_text("graph LR\n    A --> B --> C\n")
+
+        assert client.get("/download").headers["etag"] != etag
+
+    def test_uses_zerocopysend_when_supported(self, diagram_file):
+        messages = []
+
+        async def send(message):
+            if message["type"] == "http.response.zerocopysend":
+                message = {**message, "file": message["file"].read()}
+            messages.append(message)
+
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "headers": [],
+            "extensions": {"http.response.zerocopysend": {}}
+        }
+        response = ZeroCopyFileResponse(path=diagram_file, filename="diagram.mmd")
+        asyncio.run(response(scope, None, send))
+
+        assert messages[0]["type"] == "http.response.start"
+        assert messages[1] == {
+            "type": "http.response.zerocopysend",
+            "file": diagram_file.read_bytes(),
+            "more_body": False
+        }
+
+
+class TestEtagMatches:
+    """Test cases for If-None-Match comparison"""
+
+    @pytest.mark.parametrize("if_none_match, etag, expected", [
+        (None, '"a"', False),
+        ('"a"', '"a"', True),
+        ('"b", "a"', '"a"', True),
+        ('W/"a"', '"a"', True),
+        ('"a"', 'W/"a"', True),
+        ("*", '"a"', True),
+        ('"b"', '"a"', False),
+    ])
+    def test_weak_comparison(self, if_none_match, etag, expected):
+        assert etag_matches(if_none_match, etag) is expected
+
+
+class TestXAccelRedirectResponse:
+    """Test cases for the nginx internal redirect response"""
+
+    def test_headers_and_empty_body(self):
+        response = XAccelRedirectResponse("/_protected/users/ab/diagram 1.mmd", "diagram.mmd", "text/plain")
+
+        assert response.body == b""
+        assert response.headers["x-accel-redirect"] == "/_protected/users/ab/diagram%201.mmd"
+        assert response.headers["content-disposition"] == 'attachment; filename="diagram.mmd"'
+        assert response.headers["content-type"].startswith("text/plain")
+
+    def test_non_ascii_filename_is_encoded(self):
+        response = XAccelRedirectResponse("/_protected/a.md", "diagramme é.md", "text/markdown")
+
+        assert response.headers["content-disposition"] == "attachment; filename*=utf-8''diagramme%20%C3%A9.md"
+
+
+class TestStreamHelpers:
+    """Test cases for chunked response body helpers"""
+
+    def test_iter_text_chunks(self):
+        assert list(iter_text_chunks("abcdefg", chunk_size=3)) == ["abc", "def", "g"]
+        assert list(iter_text_chunks("")) == []
+
+    def test_iter_json_envelope_round_trips(self):
+        content = 'graph TD\n    A["quoted \\ text"] --> B\n' * 50 + "\u00e9\u4e2d"
+        handle = io.StringIO(content)
+
+        chunks = list(iter_json_envelope({"success": True, "size": 3}, "content", handle, chunk_size=7))
+
+        assert len(chunks) > 3
+        assert json.loads(b"".join(chunks)) == {"success": True, "size": 3, "content": content}
+        assert handle.closed
+
+    def test_iter_json_envelope_without_fields(self):
+        chunks = iter_json_envelope({}, "content", io.StringIO("abc"))
+        assert json.loads(b"".join(chunks)) == {"content": "abc"}
@@ -0,0 +1,249 @@
+import jwt
+import pytest
+from datetime import timedelta
+from unittest.mock import Mock, patch
+from fastapi import HTTPException
+
+from app.core import security
+from app.core.config import settings
+from app.core.security import (
+    create_access_token, create_refresh_token, verify_token, verify_access_token_cached, invalidate_cached_tokens,
+    get_password_hash, verify_password, encrypt_sensitive_data, decrypt_sensitive_data,
+    mask_token, validate_password_strength, create_api_key, hash_refresh_token, ENCRYPTION_KEY
+)
+from app.services.auth_service import AuthService, AuthenticationError
+from app.utils.cache import TTLCache
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    """Start every test with an empty token cache"""
+    security._token_cache.clear()
+    yield
+    security._token_cache.clear()
+
+
+class TestTTLCache:
+    """Test cases for the bounded TTL cache"""
+
+    def test_set_and_get(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert cache.get("missing", "default") == "default"
+
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert len(cache) == 2
+
+    def test_expired_entries_are_dropped(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        with patch("app.utils.cache.time.monotonic", return_value=100.0):
+            cache.set("a", 1, ttl=10)
+        with patch("app.utils.cache.time.monotonic", return_value=111.0):
+            assert cache.get("a") is None
+
+    def test_non_positive_ttl_is_not_stored(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1, ttl=0)
+        assert cache.get("a") is None
+
+    def test_discard_where(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("a", {"sub": "1"})
+        cache.set("b", {"sub": "2"})
+        assert cache.discard_where(lambda value: value["sub"] == "1") == 1
+        assert cache.get("a") is None
+        assert cache.get("b") == {"sub": "2"}
+
+
+class TestAccessTokenCache:
+    """Test cases for cached access token verification"""
+
+    def test_repeated_verification_skips_decode(self):
+        token = create_access_token({"sub": "1", "username": "testuser"})
+
+        with patch.object(security, "verify_token", wraps=security.verify_token) as verify:
+            first = verify_access_token_cached(token)
+            second = verify_access_token_cached(token)
+
+        assert first["sub"] == "1"
+        assert second == first
+        assert verify.call_count == 1
+
+    def test_bytes_and_str_tokens_share_cache_entry(self):
+        token = create_access_token({"sub": "1", "username": "testuser"})
+
+        verify_access_token_cached(token.encode())
+        with patch.object(security, "verify_token") as verify:
+            payload = verify_access_token_cached(token)
+
+        assert payload["sub"] == "1"
+        verify.assert_not_called()
+
+    def test_invalid_token_is_not_cached(self):
+        with pytest.raises(HTTPException):
+            verify_access_token_cached("not-a-token")
+        assert len(security._token_cache) == 0
+
+    def test_invalidate_cached_tokens(self):
+        token = create_access_token({"sub": "1", "username": "testuser"})
+        other = create_access_token({"sub": "2", "username": "otheruser"})
+        verify_access_token_cached(token)
+        verify_access_token_cached(other)
+
+        invalidate_cached_tokens(1)
+
+        assert len(security._token_cache) == 1
+
+
+class TestTokenVerification:
+    """Test cases for JWT decoding and claim checks"""
+
+    def test_round_trip(self):
+        token = create_access_token({"sub": "1", "username": "testuser"})
+        payload = verify_token(token)
+        assert payload["sub"] == "1"
+        assert payload["type"] == "access"
+
+    def test_expired_token_is_rejected(self):
+        token = create_access_token({"sub": "1"}, expires_delta=timedelta(seconds=-1))
+        with pytest.raises(HTTPException) as exc_info:
+            verify_token(token)
+        assert exc_info.value.status_code == 401
+
+    def test_token_without_exp_is_rejected(self):
+        token = jwt.encode({"sub": "1", "type": "access"}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        with pytest.raises(HTTPException):
+            verify_token(token)
+
+    def test_wrong_token_type_is_rejected(self):
+        token = create_refresh_token({"sub": "1"})
+        with pytest.raises(HTTPException) as exc_info:
+            verify_token(token, "access")
+        assert "Invalid token type" in exc_info.value.detail
+
+    def test_refresh_tokens_are_stored_as_digests(self):
+        token = create_refresh_token({"sub": "1"})
+        digest = hash_refresh_token(token)
+        assert digest == hash_refresh_token(token)
+        assert len(digest) == 64 and token not in digest
+
+
+class TestTokenClaims:
+    """Test cases for resolving verified token claims to a user"""
+
+    @pytest.mark.parametrize("subject", [None, "", "abc", 1])
+    def test_malformed_subject_raises_authentication_error(self, subject):
+        db = Mock()
+        with pytest.raises(AuthenticationError):
+            AuthService(db).get_user_from_token_payload({"sub": subject})
+        db.query.assert_not_called()
+
+    def test_user_is_looked_up_by_primary_key(self):
+        db = Mock()
+        db.get.return_value = Mock(is_active=True)
+
+        user = AuthService(db).get_user_from_token_payload({"sub": "7"})
+
+        assert user is db.get.return_value
+        assert db.get.call_args.args[1] == 7
+        db.query.assert_not_called()
+
+    def test_inactive_user_is_rejected(self):
+        db = Mock()
+        db.get.return_value = Mock(is_active=False)
+        with pytest.raises(HTTPException) as exc_info:
+            AuthService(db).get_user_from_token_payload({"sub": "7"})
+        assert exc_info.value.status_code == 400
+
+
+class TestPasswordHashing:
+    """Test cases for bcrypt password hashing"""
+
+    @pytest.fixture(autouse=True)
+    def fast_rounds(self):
+        with patch.object(security.settings, "PASSWORD_HASH_ROUNDS", 4):
+            yield
+
+    def test_hash_and_verify(self):
+        hashed = get_password_hash("TestPassword123!")
+        assert hashed.startswith("$2b$04$")
+        assert verify_password("TestPassword123!", hashed)
+        assert not verify_password("WrongPassword123!", hashed)
+
+    def test_long_passwords_use_first_72_bytes(self):
+        password = "A1b" * 30
+        hashed = get_password_hash(password)
+        assert verify_password(password[:72] + "ignored", hashed)
+
+
+class TestPasswordStrength:
+    """Test cases for password strength validation"""
+
+    def test_strong_password(self):
+        assert validate_password_strength("TestPassword123!") == (True, [])
+
+    def test_reports_every_missing_class(self):
+        is_strong, issues = validate_password_strength("short")
+        assert not is_strong
+        assert issues == [
+            "Password must be at least 8 characters long",
+            "Password must contain at least one uppercase letter",
+            "Password must contain at least one digit",
+            "Password must contain at least one special character",
+        ]
+
+    def test_common_password_is_case_insensitive(self):
+        _, issues = validate_password_strength("PassWord1")
+        assert "Password is too common" in issues
+
+
+class TestSensitiveDataEncryption:
+    """Test cases for token encryption at rest"""
+
+    @pytest.mark.parametrize("data", ["ghp_" + "x" * 36, "", "caf\u00e9 \u00ff", "\u4e2d\u6587 token"])
+    def test_round_trip(self, data):
+        encrypted = encrypt_sensitive_data(data)
+        assert encrypted.startswith("v1:")
+        assert decrypt_sensitive_data(encrypted) == data
+
+    def test_nonce_is_fresh_per_call(self):
+        assert encrypt_sensitive_data("ghp_token") != encrypt_sensitive_data("ghp_token")
+
+    @pytest.mark.parametrize("data", ["ghp_" + "x" * 36, "caf\u00e9 \u00ff", "\u4e2d\u6587 token"])
+    def test_legacy_xor_values_still_decrypt(self, data):
+        legacy = "".join(
+            chr(ord(char) ^ ENCRYPTION_KEY[i % len(ENCRYPTION_KEY)]) for i, char in enumerate(data)
+        ).encode().hex()
+        assert decrypt_sensitive_data(legacy) == data
+
+    def test_tampered_ciphertext_raises_value_error(self):
+        encrypted = encrypt_sensitive_data("ghp_token")
+        tampered = encrypted[:-2] + ("00" if encrypted[-2:] != "00" else "01")
+        with pytest.raises(ValueError):
+            decrypt_sensitive_data(tampered)
+
+    def test_invalid_ciphertext_raises_value_error(self):
+        with pytest.raises(ValueError):
+            decrypt_sensitive_data("not-hex")
+
+    def test_mask_token(self):
+        assert mask_token("ghp_abcdef", 6) == "ghp_ab****"
+        assert mask_token("abc", 6) == "***"
+
+
+class TestApiKeys:
+    """Test API key generation"""
+
+    def test_api_key_embeds_current_unix_time(self):
+        with patch("app.core.security.time.time", return_value=1700000000.5):
+            prefix, timestamp, random_part = create_api_key().split("_", 2)
+        assert (prefix, timestamp) == ("atk", "1700000000")
+        assert len(random_part) == 43